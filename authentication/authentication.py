@@ -0,0 +1,127 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+
+from todo import metrics, timing
+
+class ExpiringLRUCache:
+    """
+    Small thread safe in-process LRU cache whose entries expire at a given time.
+    """
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, expires_at):
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last = False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+JWT_AUTH_CACHE = {
+    'MAX_TOKENS': 10000,
+    'MAX_USERS': 10000,
+    'USER_CHECK_TTL': 60,
+    **getattr(settings, 'JWT_AUTH_CACHE', {}),
+}
+
+# Verified tokens, keyed by the raw token, expiring with the token itself
+verified_tokens = ExpiringLRUCache(JWT_AUTH_CACHE['MAX_TOKENS'])
+# Ids of users recently checked to exist and be active
+active_users = ExpiringLRUCache(JWT_AUTH_CACHE['MAX_USERS'])
+
+class CachedJWTAuthentication(JWTStatelessUserAuthentication):
+    """
+    JWT authentication building the request user from the token claims
+    (the TOKEN_USER_CLASS setting) instead of selecting it from the database.
+
+    Verified signatures are remembered until the token expires and the user
+    active check is remembered for USER_CHECK_TTL seconds, so in steady state a
+    request costs no query and at most one HMAC.
+    """
+    def authenticate(self, request):
+        with timing.phase('auth'):
+            return super().authenticate(request)
+
+    def get_validated_token(self, raw_token):
+        validated_token = verified_tokens.get(raw_token)
+        metrics.cache_requests.inc(cache = 'jwt', entry = 'token', result = 'miss' if validated_token is None else 'hit')
+        if validated_token is None:
+            validated_token = super().get_validated_token(raw_token)
+            verified_tokens.set(raw_token, validated_token, validated_token['exp'])
+        return validated_token
+
+    def get_user(self, validated_token):
+        user = super().get_user(validated_token)
+        if not self.is_known_active(user):
+            try:
+                db_user = self.user_model.objects.get(**{api_settings.USER_ID_FIELD: user.id})
+            except self.user_model.DoesNotExist:
+                db_user = None
+            self.check_active(user, db_user)
+        return user
+
+    async def aauthenticate(self, request):
+        """
+        authenticate() for async views, the user check runs on the async ORM.
+        """
+        with timing.phase('auth'):
+            return await self._aauthenticate(request)
+
+    async def _aauthenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+
+        user = super().get_user(validated_token)
+        if not self.is_known_active(user):
+            try:
+                db_user = await self.user_model.objects.aget(**{api_settings.USER_ID_FIELD: user.id})
+            except self.user_model.DoesNotExist:
+                db_user = None
+            self.check_active(user, db_user)
+        return user, validated_token
+
+    def is_known_active(self, user):
+        active = active_users.get(user.id) is not None
+        metrics.cache_requests.inc(cache = 'jwt', entry = 'user', result = 'hit' if active else 'miss')
+        return active
+
+    def check_active(self, user, db_user):
+        if db_user is None:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+        if not db_user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        active_users.set(user.id, True, time.time() + JWT_AUTH_CACHE['USER_CHECK_TTL'])
@@ -0,0 +1,25 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+from authentication import hashing
+
+UserModel = get_user_model()
+
+class HashingPoolModelBackend(ModelBackend):
+    """
+    ModelBackend checking passwords on the bounded hashing pool, see authentication.hashing.
+    """
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # Run the hasher once to reduce the timing difference between
+            # an existing and a nonexistent user.
+            hashing.make_password(password)
+        else:
+            if hashing.check_password(user, password) and self.user_can_authenticate(user):
+                return user
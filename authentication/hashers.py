@@ -0,0 +1,14 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+class ProfilePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2 hasher taking its cost from PASSWORD_HASHING['ITERATIONS'].
+
+    It keeps the pbkdf2_sha256 algorithm name, so existing hashes still verify,
+    and must_update() flags any hash made with another iteration count, which
+    gets it rehashed on the next login.
+    """
+    @property
+    def iterations(self):
+        return settings.PASSWORD_HASHING.get('ITERATIONS') or PBKDF2PasswordHasher.iterations
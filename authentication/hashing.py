@@ -0,0 +1,115 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from todo import metrics
+
+logger = logging.getLogger(__name__)
+
+class HashingUnavailable(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many password checks in progress, try again later.'
+    default_code = 'hashing_unavailable'
+
+class HashingStats:
+    """
+    Latency counters of the password hashing pool.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def observe(self, seconds):
+        with self._lock:
+            self.count += 1
+            self.total_seconds += seconds
+            self.max_seconds = max(self.max_seconds, seconds)
+        metrics.password_hash_duration.observe(seconds)
+
+    def reject(self):
+        with self._lock:
+            self.rejected += 1
+        metrics.password_hash_rejected.inc()
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                'count': self.count,
+                'rejected': self.rejected,
+                'total_seconds': self.total_seconds,
+                'max_seconds': self.max_seconds,
+            }
+
+class HashingPool:
+    """
+    Runs password hashing on a dedicated, bounded set of threads.
+
+    PBKDF2 releases the GIL, so capping the number of hashing threads caps
+    the CPU a burst of logins can take from the rest of the traffic. At most
+    `max_workers + max_pending` calls are admitted, a call waiting longer
+    than `queue_timeout` for a slot or a worker fails with a 503.
+    """
+    def __init__(self, max_workers, max_pending, queue_timeout):
+        self.queue_timeout = queue_timeout
+        self.stats = HashingStats()
+        self._slots = threading.BoundedSemaphore(max_workers + max_pending)
+        self._executor = ThreadPoolExecutor(max_workers = max_workers, thread_name_prefix = 'password-hashing')
+
+    def run(self, func, *args):
+        deadline = time.monotonic() + self.queue_timeout
+        if not self._slots.acquire(timeout = self.queue_timeout):
+            self.stats.reject()
+            raise HashingUnavailable()
+        try:
+            return self._executor.submit(self._call, deadline, func, *args).result()
+        finally:
+            self._slots.release()
+
+    def _call(self, deadline, func, *args):
+        if time.monotonic() > deadline:
+            self.stats.reject()
+            raise HashingUnavailable()
+        started = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.stats.observe(elapsed)
+            logger.debug('Password hashing took %.1fms', elapsed * 1000)
+
+PASSWORD_HASHING = {
+    'MAX_WORKERS': 2,
+    'MAX_PENDING': 8,
+    'QUEUE_TIMEOUT': 5,
+    **getattr(settings, 'PASSWORD_HASHING', {}),
+}
+
+pool = HashingPool(
+    PASSWORD_HASHING['MAX_WORKERS'], PASSWORD_HASHING['MAX_PENDING'], PASSWORD_HASHING['QUEUE_TIMEOUT'],
+)
+
+def make_password(raw_password):
+    """
+    Hashes a password with the preferred hasher on the hashing pool.
+    """
+    return pool.run(hashers.make_password, raw_password)
+
+def check_password(user, raw_password):
+    """
+    Verifies a password on the hashing pool. A correct password stored with
+    an outdated hasher or cost profile is transparently rehashed and saved.
+    """
+    is_correct, must_update = pool.run(hashers.verify_password, raw_password, user.password)
+    if is_correct and must_update:
+        user.password = make_password(raw_password)
+        user.save(update_fields = ['password'])
+    return is_correct
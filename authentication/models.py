@@ -1,6 +1,8 @@
 from django.db import models
 from django.contrib.auth.models import BaseUserManager, AbstractBaseUser
 
+from authentication import hashing
+
 class UserManager(BaseUserManager):
     def create_user(self, email, name, password=None):
         """
@@ -14,7 +16,8 @@ class UserManager(BaseUserManager):
             name=name,
         )
 
-        user.set_password(password)
+        # hashed on the bounded hashing pool instead of the request thread
+        user.password = hashing.make_password(password)
         user.save(using=self._db)
         return user
 
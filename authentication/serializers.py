@@ -1,8 +1,9 @@
 from rest_framework import serializers
 
 from authentication.models import User
+from todo.timing import TimedSerializerMixin
 
-class UserRegistrationSerializer(serializers.ModelSerializer):
+class UserRegistrationSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     # We are writing this becoz we need confirm password field in our Registratin Request
     password_check = serializers.CharField(style={'input_type':'password'}, write_only=True)
     class Meta:
@@ -24,7 +25,7 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         validated_data.pop('password_check')
         return User.objects.create_user(**validated_data)
 
-class UserLoginSerializer(serializers.ModelSerializer):
+class UserLoginSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     email = serializers.EmailField(max_length=255)
     class Meta:
         model = User
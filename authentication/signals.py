@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from authentication.authentication import active_users
+from authentication.models import User
+
+@receiver([post_save, post_delete], sender=User)
+def forget_active_user(sender, instance, **kwargs):
+    # Deleted or deactivated users are rejected right away in this process,
+    # other processes notice within USER_CHECK_TTL.
+    active_users.delete(instance.pk)
@@ -1,9 +1,17 @@
+import tempfile
+import threading
+
 from rest_framework import status, exceptions
+from django.conf import settings
+from django.test import override_settings
 from rest_framework.test import APITestCase
+from authentication import hashing
+from authentication.hashing import HashingPool, HashingUnavailable
 from authentication.models import User
 
 register_url = '/users/register'
 login_url = '/users/login'
+tasks_url = '/tasks'
 
 class UserRegisterationTests(APITestCase):
     """
@@ -161,3 +169,186 @@ class UserLoginTests(APITestCase):
         assert response.data['token']['refresh'] is not None
         assert response.data['token']['access'] is not None
         assert response.data['msg'] == 'Login Success'
+
+class JWTAuthenticationTests(APITestCase):
+    """
+    Contains tests for the cached JWT authentication
+    """
+    def register(self):
+        """
+        Common function for registering a user
+        """
+        register_data = {
+            'name': 'Test',
+            'email': 'test@gmail.com',
+            'password': 'password',
+            'password_check': 'password',
+        }
+        response = self.client.post(register_url, register_data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return {
+           'Authorization': 'Bearer ' + response.data['token']['access']
+        }
+
+    def test_cached_authentication(self):
+        """
+        Ensure a known token authenticates without any query.
+        """
+        headers = self.register()
+        self.client.get(tasks_url, headers = headers)
+        with self.assertNumQueries(0):
+            response = self.client.get(tasks_url, headers = headers)
+        assert response.status_code == 200
+
+    def test_deleted_user(self):
+        """
+        Ensure the token of a deleted user is rejected even when cached.
+        """
+        headers = self.register()
+        self.client.get(tasks_url, headers = headers)
+        User.objects.all().delete()
+        response = self.client.get(tasks_url, headers = headers)
+        assert response.status_code == 401
+        self.assertEqual(response.data['code'], 'user_not_found')
+
+    def test_invalid_token(self):
+        """
+        Ensure a token with a bad signature is rejected.
+        """
+        headers = self.register()
+        response = self.client.get(tasks_url, headers = {'Authorization': headers['Authorization'][:-2] + 'xx'})
+        assert response.status_code == 401
+        self.assertEqual(response.data['code'], 'token_not_valid')
+
+class PasswordHashingTests(APITestCase):
+    """
+    Contains tests for the bounded password hashing
+    """
+    def test_pool_saturated(self):
+        """
+        Ensure hashing fails fast with a 503 once the pool is saturated.
+        """
+        pool = HashingPool(max_workers=1, max_pending=0, queue_timeout=0.05)
+        started = threading.Event()
+        release = threading.Event()
+
+        def block():
+            started.set()
+            release.wait(5)
+
+        worker = threading.Thread(target=pool.run, args=(block,))
+        worker.start()
+        started.wait(5)
+        with self.assertRaises(HashingUnavailable) as error:
+            pool.run(len, 'password')
+        self.assertEqual(error.exception.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        release.set()
+        worker.join()
+        self.assertEqual(pool.run(len, 'password'), 8)
+        self.assertEqual(pool.stats.as_dict()['rejected'], 1)
+
+    def test_rehash_on_login(self):
+        """
+        Ensure a password is rehashed on login after the cost profile changed.
+        """
+        register_data = {
+            'name': 'Test',
+            'email': 'test@gmail.com',
+            'password': 'password',
+            'password_check': 'password',
+        }
+        self.client.post(register_url, register_data, format='json')
+        self.assertTrue(User.objects.get().password.startswith('pbkdf2_sha256$720000$'))
+        login_data = {
+            'email': 'test@gmail.com',
+            'password': 'password',
+        }
+        with self.settings(PASSWORD_HASHING={'ITERATIONS': 1000}):
+            response = self.client.post(login_url, login_data, format='json')
+        assert response.status_code == 200
+        self.assertTrue(User.objects.get().password.startswith('pbkdf2_sha256$1000$'))
+        response = self.client.post(login_url, login_data, format='json')
+        assert response.status_code == 200
+        self.assertTrue(User.objects.get().password.startswith('pbkdf2_sha256$720000$'))
+
+class ThrottlingTests(APITestCase):
+    """
+    Contains tests for throttling of the authentication endpoints
+    """
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        throttling = {
+            **settings.THROTTLING,
+            'ENABLED': True,
+            'STORE': 'sqlite',
+            'PATH': directory.name + '/throttle.sqlite3',
+            'RATES': {'login_ip': '3/min', 'login_account': '2/min', 'register_ip': '2/min'},
+        }
+        settings_override = override_settings(THROTTLING = throttling)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_login_throttled(self):
+        """
+        Ensure logins are throttled per account and per IP before the password is checked.
+        """
+        register_data = {
+            'name': 'Test',
+            'email': 'test@gmail.com',
+            'password': 'password',
+            'password_check': 'password',
+        }
+        self.client.post(register_url, register_data, format='json')
+        login_data = {
+            'email': 'test@gmail.com',
+            'password': 'wrong',
+        }
+        for _ in range(2):
+            response = self.client.post(login_url, login_data, format='json')
+            self.assertNotEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        checked = hashing.pool.stats.as_dict()['count']
+        response = self.client.post(login_url, {**login_data, 'email': 'TEST@gmail.com'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertIn('errors', response.json())
+        self.assertEqual(hashing.pool.stats.as_dict()['count'], checked)
+
+        # The third attempt also used the last token of the IP
+        response = self.client.post(login_url, {**login_data, 'email': 'other@gmail.com'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_register_throttled(self):
+        """
+        Ensure registrations are throttled per IP.
+        """
+        for i in range(2):
+            register_data = {
+                'name': 'Test',
+                'email': 'test%d@gmail.com' % i,
+                'password': 'password',
+                'password_check': 'password',
+            }
+            response = self.client.post(register_url, register_data, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = self.client.post(register_url, {**register_data, 'email': 'test2@gmail.com'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(User.objects.count(), 2)
+
+    def test_forwarded_for_ignored(self):
+        """
+        Ensure a client cannot get fresh IP buckets by rotating X-Forwarded-For.
+        """
+        statuses = []
+        for i in range(6):
+            register_data = {
+                'name': 'Test',
+                'email': 'test%d@gmail.com' % i,
+                'password': 'password',
+                'password_check': 'password',
+            }
+            response = self.client.post(register_url, register_data, format='json', HTTP_X_FORWARDED_FOR='10.0.0.%d' % i)
+            statuses.append(response.status_code)
+        self.assertEqual(statuses.count(status.HTTP_201_CREATED), 2)
+        self.assertEqual(User.objects.count(), 2)
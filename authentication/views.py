@@ -8,6 +8,7 @@ from django.contrib.auth import authenticate
 
 from authentication.renderers import UserRenderer
 from authentication.serializers import UserRegistrationSerializer, UserLoginSerializer
+from todo.throttling import ClientIPThrottle, LoginAccountThrottle
 
 def get_tokens_for_user(user):
     """
@@ -26,6 +27,9 @@ class UserRegistrationView(GenericAPIView):
     """
     renderer_classes = [UserRenderer]
     serializer_class = UserRegistrationSerializer
+    # Rejected before the password is hashed
+    throttle_classes = [ClientIPThrottle]
+    throttle_scope = 'register'
     @swagger_auto_schema(responses={
         status.HTTP_201_CREATED: openapi.Schema(
             type=openapi.TYPE_OBJECT,
@@ -61,6 +65,9 @@ class UserLoginView(GenericAPIView):
     """
     renderer_classes = [UserRenderer]
     serializer_class = UserLoginSerializer
+    # Rejected before the password is checked
+    throttle_classes = [ClientIPThrottle, LoginAccountThrottle]
+    throttle_scope = 'login'
     @swagger_auto_schema(responses={
         status.HTTP_200_OK: openapi.Schema(
             type=openapi.TYPE_OBJECT,
@@ -0,0 +1,14 @@
+from django.apps import AppConfig
+
+class TodoConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'todo'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from todo import checks, signals  # noqa: F401
+        from todo import pragmas, timing
+
+        connection_created.connect(pragmas.apply_pragmas)
+        connection_created.connect(timing.install_db_wrapper)
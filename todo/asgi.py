@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'todo.settings')
+# Serve the task endpoints with the native async views, see todo/asgi_urls.py
+os.environ.setdefault('DJANGO_ROOT_URLCONF', 'todo.asgi_urls')
 
 application = get_asgi_application()
@@ -0,0 +1,16 @@
+from django.urls import path
+
+from todo import async_views, urls
+
+# Same routes as todo.urls, with the task CRUD endpoints swapped for their
+# native async versions. Selected by todo/asgi.py through DJANGO_ROOT_URLCONF.
+async_views_by_name = {
+    'tasks': async_views.AsyncTaskListView.as_view(),
+    'tasks-Detail': async_views.AsyncTaskDetailView.as_view(),
+}
+
+urlpatterns = [
+    path(str(pattern.pattern), async_views_by_name[pattern.name], name=pattern.name)
+    if getattr(pattern, 'name', None) in async_views_by_name else pattern
+    for pattern in urls.urlpatterns
+]
@@ -0,0 +1,176 @@
+import math
+
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError
+from django.http import Http404, HttpResponse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions, status
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
+from rest_framework.request import Request
+
+from authentication.authentication import CachedJWTAuthentication
+from todo import cache, routers
+from todo.conditional import aconditional, task_detail_validators, task_list_validators
+from todo.idempotency import aidempotent
+from todo.models import Task
+from todo.pagination import KeysetPagination
+from todo.renderers import TaskRenderer
+from todo.serializers import TaskSerializer
+from todo.throttling import ClientIPThrottle, UserThrottle
+from todo.views import filter_tasks
+
+class AsyncTaskView(View):
+    """
+    Base view for the native async task endpoints served through todo/asgi.py.
+
+    They mirror the DRF task views, but authenticate and query through the
+    async ORM. The throttle check, the validators and the cache each run in
+    one sync_to_async call, as the bucket store, the cache backends and the
+    ORM underneath are synchronous.
+    """
+    authentication = CachedJWTAuthentication()
+    throttle_classes = [ClientIPThrottle, UserThrottle]
+    throttle_scope = 'tasks'
+    renderer = TaskRenderer()
+    parsers = [FormParser(), MultiPartParser(), JSONParser()]
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # Token authenticated like the DRF views, so no CSRF check either
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        request = Request(request, parsers=self.parsers)
+        try:
+            authenticated = await self.authentication.aauthenticate(request)
+            if authenticated is None:
+                raise exceptions.NotAuthenticated()
+            self.user, _ = authenticated
+            request.user = self.user
+            await sync_to_async(self.check_throttles)(request)
+            return await super().dispatch(request, *args, **kwargs)
+        except Http404:
+            return self.respond({'detail': 'No Task matches the given query.'}, status.HTTP_404_NOT_FOUND)
+        except exceptions.APIException as exc:
+            response = self.respond(exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}, exc.status_code)
+            if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+                response['WWW-Authenticate'] = self.authentication.authenticate_header(request)
+                response.status_code = status.HTTP_401_UNAUTHORIZED
+            if isinstance(exc, exceptions.Throttled) and exc.wait is not None:
+                response['Retry-After'] = '%d' % math.ceil(exc.wait)
+            return response
+
+    def check_throttles(self, request):
+        throttles = [throttle_class() for throttle_class in self.throttle_classes]
+        wait = [throttle.wait() for throttle in throttles if not throttle.allow_request(request, self)]
+        if wait:
+            raise exceptions.Throttled(max(wait))
+
+    def respond(self, data, status_code):
+        content = self.renderer.render(data, renderer_context={'response': HttpResponse(status=status_code)})
+        return HttpResponse(content, status=status_code, content_type='application/json')
+
+    def duplicate_task_response(self):
+        return self.respond({
+            'errors': {
+                'non_field_errors' : ['There is already a non complete task']
+            }
+        }, status.HTTP_400_BAD_REQUEST)
+
+    async def get_task(self, pk, fields=None):
+        queryset = Task.objects.only(*fields) if fields is not None else Task.objects
+        try:
+            return await queryset.aget(pk=pk, user_id=self.user.id)
+        except Task.DoesNotExist:
+            raise Http404
+
+class AsyncTaskListView(AsyncTaskView):
+    """
+    Async version of TaskRegistrationView
+    """
+    @aconditional(task_list_validators)
+    async def get(self, request):
+        """
+        Method to run on task get request
+        """
+        fields = TaskSerializer.parse_fields(request.query_params.get('fields'))
+
+        async def build_page():
+            paginator = KeysetPagination()
+            tasks = filter_tasks(Task.objects.filter(user_id = self.user.id), request.query_params)
+            if fields is not None:
+                tasks = tasks.only(*fields, *(field.lstrip('-') for field in paginator.get_ordering(request)))
+            with routers.replica_reads(self.user.id):
+                page = await paginator.apaginate_queryset(tasks, request)
+            return {
+                'data': TaskSerializer(page, many = True, fields = fields).data,
+                'next': paginator.next_cursor,
+                'prev': paginator.prev_cursor,
+            }
+
+        payload = await cache.aget_or_set(self.user.id, build_page, 'list', request.get_full_path(), request.META.get('HTTP_ACCEPT', ''))
+        return self.respond(payload, status.HTTP_200_OK)
+
+    @aidempotent
+    async def post(self, request):
+        """
+        Method to run on task creation post request
+        """
+        serializer = TaskSerializer(data = request.data)
+        if not serializer.is_valid():
+            return self.respond(serializer.errors, status.HTTP_400_BAD_REQUEST)
+        try:
+            task = await Task.objects.acreate(user_id = self.user.id, **serializer.validated_data)
+        except IntegrityError:
+            return self.duplicate_task_response()
+        return self.respond({
+            'data': TaskSerializer(task).data,
+            'msg' : 'Task created'
+        }, status.HTTP_201_CREATED)
+
+class AsyncTaskDetailView(AsyncTaskView):
+    """
+    Async version of TaskDetailView
+    """
+    @aconditional(task_detail_validators)
+    async def get(self, request, pk):
+        """
+        Method to run on task detail get request
+        """
+        fields = TaskSerializer.parse_fields(request.query_params.get('fields'))
+
+        async def build_task():
+            with routers.replica_reads(self.user.id):
+                task = await self.get_task(pk, fields)
+            return TaskSerializer(task, fields = fields).data
+
+        data = await cache.aget_or_set(self.user.id, build_task, 'detail', request.get_full_path(), request.META.get('HTTP_ACCEPT', ''))
+        return self.respond({'data': data}, status.HTTP_200_OK)
+
+    @aidempotent
+    async def put(self, request, pk):
+        """
+        Method to run on task updation request
+        """
+        task = await self.get_task(pk)
+        serializer = TaskSerializer(instance = task, data = request.data)
+        if not serializer.is_valid():
+            return self.respond(serializer.errors, status.HTTP_400_BAD_REQUEST)
+        for field, value in serializer.validated_data.items():
+            setattr(task, field, value)
+        try:
+            await task.asave()
+        except IntegrityError:
+            return self.duplicate_task_response()
+        return self.respond({'data': 'Task updated successfully'}, status.HTTP_200_OK)
+
+    async def delete(self, request, pk):
+        """
+        Method to run on task deletion request
+        """
+        task = await self.get_task(pk)
+        await task.adelete()
+        await sync_to_async(cache.invalidate)(self.user.id)
+        await sync_to_async(routers.pin_to_primary)(self.user.id)
+        return self.respond({'data': 'Task deleted successfully'}, status.HTTP_200_OK)
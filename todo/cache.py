@@ -0,0 +1,170 @@
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+from todo import metrics
+
+TASK_CACHE_ALIAS = 'tasks'
+
+class SQLiteCache(BaseCache):
+    """
+    Cache backend keeping its entries in one SQLite file in the LOCATION
+    directory, shared by the worker processes on one host.
+
+    A set is a single UPSERT plus dropping the expired rows through an index,
+    FileBasedCache instead lists its whole directory to cull on every set.
+    The file only holds cached data, it is not synced to disk.
+    """
+    def __init__(self, location, params):
+        super().__init__(params)
+        self.path = os.path.join(location, 'cache.sqlite3')
+        self._local = threading.local()
+
+    def connect(self):
+        # A connection is not carried over into a forked worker
+        if getattr(self._local, 'pid', None) != os.getpid():
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode = WAL')
+            conn.execute('PRAGMA synchronous = OFF')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL)'
+                ' WITHOUT ROWID'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS entries_expires ON entries (expires)')
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return self._local.conn
+
+    def upsert(self, key, value, timeout, version, only_expired):
+        key = self.make_and_validate_key(key, version=version)
+        conn = self.connect()
+        now = time.time()
+        conn.execute('DELETE FROM entries WHERE expires <= ?', (now,))
+        cursor = conn.execute(
+            'INSERT INTO entries (key, value, expires) VALUES (:key, :value, :expires) '
+            'ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires = excluded.expires'
+            + (' WHERE entries.expires <= :now' if only_expired else ''),
+            {'key': key, 'value': pickle.dumps(value, pickle.HIGHEST_PROTOCOL), 'expires': self.get_backend_timeout(timeout), 'now': now},
+        )
+        return cursor.rowcount > 0
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.upsert(key, value, timeout, version, only_expired=True)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.upsert(key, value, timeout, version, only_expired=False)
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self.connect().execute(
+            'SELECT value FROM entries WHERE key = ? AND (expires IS NULL OR expires > ?)', (key, time.time()),
+        ).fetchone()
+        return default if row is None else pickle.loads(row[0])
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self.connect().execute(
+            'UPDATE entries SET expires = ? WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (self.get_backend_timeout(timeout), key, time.time()),
+        )
+        return cursor.rowcount > 0
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self.connect().execute('DELETE FROM entries WHERE key = ?', (key,)).rowcount > 0
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self.connect().execute(
+            'SELECT 1 FROM entries WHERE key = ? AND (expires IS NULL OR expires > ?)', (key, time.time()),
+        ).fetchone() is not None
+
+    def clear(self):
+        self.connect().execute('DELETE FROM entries')
+
+def get_cache():
+    return caches[TASK_CACHE_ALIAS]
+
+def is_shared():
+    """
+    Whether every worker process sees the same tasks cache, a local memory
+    cache is only invalidated in the process that handled the write.
+    """
+    return not isinstance(get_cache(), LocMemCache)
+
+def generation_key(user_id):
+    return 'tasks:%s:gen' % user_id
+
+def get_generation(user_id):
+    """
+    Every cached entry of a user is keyed by the user's current generation, so
+    invalidating is a single write that orphans all older entries. A missing
+    generation (never set or evicted) starts a fresh random one, so entries
+    from before an eviction can never match again.
+    """
+    cache = get_cache()
+    generation = cache.get(generation_key(user_id))
+    if generation is None:
+        cache.add(generation_key(user_id), uuid.uuid4().hex, timeout = None)
+        generation = cache.get(generation_key(user_id))
+    return generation
+
+def make_key(user_id, *parts):
+    digest = hashlib.md5('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+    return 'tasks:%s:%s:%s' % (user_id, get_generation(user_id), digest)
+
+def record(value, *parts):
+    metrics.cache_requests.inc(cache = TASK_CACHE_ALIAS, entry = parts[0], result = 'miss' if value is None else 'hit')
+    return value
+
+def lookup(user_id, *parts):
+    """
+    The key of an entry under the user's current generation and its cached value.
+    """
+    key = make_key(user_id, *parts)
+    return key, record(get_cache().get(key), *parts)
+
+def get_or_set(user_id, compute, *parts):
+    """
+    Read-through helper, returns the cached value or stores the computed one.
+    The value is stored under the key it was looked up with, so a write
+    bumping the generation in between orphans it instead of caching it.
+    """
+    key, value = lookup(user_id, *parts)
+    if value is None:
+        value = compute()
+        get_cache().set(key, value)
+    return value
+
+async def aget_or_set(user_id, compute, *parts):
+    """
+    Async version of get_or_set() taking a coroutine function. The cache
+    backends are synchronous, so reading and writing happen in a thread.
+    """
+    key, value = await sync_to_async(lookup)(user_id, *parts)
+    if value is None:
+        value = await compute()
+        await sync_to_async(get_cache().set)(key, value)
+    return value
+
+def invalidate(user_id):
+    """
+    Drops every cached task entry of a user.
+
+    Invalidates right away and again once the surrounding transaction commits,
+    so a read racing the write cannot leave the old rows cached.
+    """
+    def bump():
+        get_cache().set(generation_key(user_id), uuid.uuid4().hex, timeout = None)
+    bump()
+    transaction.on_commit(bump)
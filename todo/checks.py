@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.core import checks
+
+from todo import cache
+
+@checks.register(checks.Tags.caches, checks.Tags.database)
+def check_replica_pin_cache(app_configs, **kwargs):
+    """
+    The read-your-writes pins of todo.routers live in the tasks cache, every
+    worker has to see them or a write on one is followed by stale replica
+    reads on another.
+    """
+    if settings.DATABASE_REPLICAS and not cache.is_shared():
+        return [checks.Error(
+            'Read replicas need a tasks cache shared by the worker processes.',
+            hint='Unset TASK_CACHE_BACKEND=locmem, or unset DB_REPLICA_PATH.',
+            id='todo.E001',
+        )]
+    return []
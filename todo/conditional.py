@@ -0,0 +1,98 @@
+import hashlib
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from todo import cache
+from todo.models import Task
+
+def make_etag(request, *parts):
+    """
+    Builds a strong ETag from the validator parts, the request path and the
+    negotiated representation, scoped to the requesting user.
+    """
+    key = '|'.join(str(part) for part in (
+        request.user.id, request.get_full_path(), request.META.get('HTTP_ACCEPT', ''), *parts
+    ))
+    return quote_etag(hashlib.sha256(key.encode('utf-8')).hexdigest()[:32])
+
+def cached_validators(request, compute, entry):
+    """
+    Validators are only cached in a shared cache: a stale one in a per-process
+    cache would answer 304 for tasks changed through another worker.
+    """
+    if not cache.is_shared():
+        return compute()
+    return cache.get_or_set(request.user.id, compute, entry, request.get_full_path(), request.META.get('HTTP_ACCEPT', ''))
+
+def task_list_validators(request):
+    """
+    Validators for a task list page, from one aggregate over the user's tasks.
+    count and max(id) catch deletions and inserts that max(updated) alone would miss.
+    """
+    def compute():
+        aggregate = Task.objects.filter(user_id = request.user.id).aggregate(
+            last_updated = Max('updated'), count = Count('id'), max_id = Max('id'),
+        )
+        # No Last-Modified here, deleting a task does not move max(updated) forward
+        return make_etag(request, aggregate['last_updated'], aggregate['count'], aggregate['max_id']), None
+
+    return cached_validators(request, compute, 'list-validators')
+
+def task_detail_validators(request, pk):
+    """
+    Validators for a single task, from its updated timestamp.
+    """
+    def compute():
+        updated = Task.objects.filter(pk = pk, user_id = request.user.id).values_list('updated', flat = True).first()
+        if updated is None:
+            return None, None
+        return make_etag(request, pk, updated.isoformat()), updated
+
+    return cached_validators(request, compute, 'detail-validators')
+
+def add_validators(response, etag, timestamp):
+    if response.status_code in (200, 304):
+        if etag:
+            response.headers.setdefault('ETag', etag)
+        if timestamp:
+            response.headers.setdefault('Last-Modified', http_date(timestamp))
+    # The representation is negotiated, see the columnar task list
+    patch_vary_headers(response, ['Authorization', 'Accept'])
+    return response
+
+def conditional(validators):
+    """
+    Decorator for view methods, answers If-None-Match / If-Modified-Since
+    with a 304 before the view queries, serializes or renders anything.
+    """
+    def decorator(method):
+        @wraps(method)
+        def inner(self, request, *args, **kwargs):
+            etag, last_modified = validators(request, *args, **kwargs)
+            timestamp = int(last_modified.timestamp()) if last_modified else None
+            response = get_conditional_response(request, etag = etag, last_modified = timestamp)
+            if response is None:
+                response = method(self, request, *args, **kwargs)
+            return add_validators(response, etag, timestamp)
+        return inner
+    return decorator
+
+def aconditional(validators):
+    """
+    Async version of conditional() for the handlers of todo.async_views.
+    """
+    def decorator(method):
+        @wraps(method)
+        async def inner(self, request, *args, **kwargs):
+            etag, last_modified = await sync_to_async(validators)(request, *args, **kwargs)
+            timestamp = int(last_modified.timestamp()) if last_modified else None
+            response = get_conditional_response(request, etag = etag, last_modified = timestamp)
+            if response is None:
+                response = await method(self, request, *args, **kwargs)
+            return add_validators(response, etag, timestamp)
+        return inner
+    return decorator
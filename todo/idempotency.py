@@ -0,0 +1,177 @@
+import asyncio
+import hashlib
+import time
+from datetime import timedelta
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse
+from django.utils import timezone
+from rest_framework import exceptions, status
+
+from todo.models import IdempotencyRecord
+
+HEADER = 'HTTP_IDEMPOTENCY_KEY'
+POLL_SECONDS = 0.05
+
+class IdempotencyKeyInFlight(exceptions.APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'A request with this Idempotency-Key is still being processed, retry later.'
+    default_code = 'idempotency_key_in_flight'
+
+class IdempotencyKeyReused(exceptions.APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = 'This Idempotency-Key was already used for a different request.'
+    default_code = 'idempotency_key_reused'
+
+def get_key(request):
+    """
+    The Idempotency-Key header of a request, None when it is absent.
+    """
+    key = request.META.get(HEADER)
+    if key is None:
+        return None
+    key = key.strip()
+    if not key or len(key) > IdempotencyRecord._meta.get_field('key').max_length:
+        raise exceptions.ValidationError({'Idempotency-Key': ['Expected between 1 and 255 characters']})
+    return key
+
+def make_fingerprint(request):
+    """
+    Hash of what makes two requests the same request, a key cannot be reused for another one.
+    """
+    digest = hashlib.sha256()
+    for part in (request.method, request.get_full_path(), request.content_type or '', request.META.get('HTTP_ACCEPT', '')):
+        digest.update(part.encode('utf-8') + b'\0')
+    digest.update(request.body)
+    return digest.hexdigest()
+
+def is_stale(record, now):
+    if record.created < now - timedelta(seconds = settings.IDEMPOTENCY_KEY_TTL_SECONDS):
+        return True
+    return record.status_code is None and record.created < now - timedelta(seconds = settings.IDEMPOTENCY_LOCK_SECONDS)
+
+def claim(user_id, key, fingerprint):
+    """
+    Inserts an unfinished record for the key, the caller then runs the request
+    and returns None. When the key is already there its record is returned
+    instead, expired records and claims of dead workers are replaced.
+    """
+    while True:
+        now = timezone.now()
+        try:
+            with transaction.atomic():
+                IdempotencyRecord.objects.create(user_id = user_id, key = key, fingerprint = fingerprint, created = now)
+            return None
+        except IntegrityError:
+            pass
+        record = IdempotencyRecord.objects.filter(user_id = user_id, key = key).first()
+        if record is None:
+            continue
+        if is_stale(record, now):
+            IdempotencyRecord.objects.filter(id = record.id, created = record.created).delete()
+            continue
+        if record.fingerprint != fingerprint:
+            raise IdempotencyKeyReused()
+        return record
+
+def begin(user_id, key, fingerprint):
+    """
+    Claims the key, or waits for the request holding it to finish and returns
+    its record, so concurrent duplicates are coalesced into one.
+    """
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+    while True:
+        record = claim(user_id, key, fingerprint)
+        if record is None or record.status_code is not None:
+            return record
+        if time.monotonic() >= deadline:
+            raise IdempotencyKeyInFlight()
+        time.sleep(POLL_SECONDS)
+
+async def abegin(user_id, key, fingerprint):
+    """
+    Async version of begin(), waits without holding a thread.
+    """
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+    while True:
+        record = await sync_to_async(claim)(user_id, key, fingerprint)
+        if record is None or record.status_code is not None:
+            return record
+        if time.monotonic() >= deadline:
+            raise IdempotencyKeyInFlight()
+        await asyncio.sleep(POLL_SECONDS)
+
+def complete(user_id, key, response):
+    """
+    Stores the rendered response of a claimed key. Server errors are not
+    stored, the claim is dropped so a retry runs the request again.
+    """
+    records = IdempotencyRecord.objects.filter(user_id = user_id, key = key, status_code__isnull = True)
+    if response.status_code >= 500:
+        records.delete()
+    else:
+        records.update(status_code = response.status_code, content_type = response.get('Content-Type', ''), content = response.content)
+
+def abandon(user_id, key):
+    IdempotencyRecord.objects.filter(user_id = user_id, key = key, status_code__isnull = True).delete()
+
+def replay(record):
+    response = HttpResponse(bytes(record.content), status = record.status_code, content_type = record.content_type)
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+def idempotent(method):
+    """
+    Decorator for the write handlers of DRF views. A request with an
+    Idempotency-Key header runs once per user and key, its retries get the
+    stored response byte for byte without running the handler.
+    """
+    @wraps(method)
+    def inner(self, request, *args, **kwargs):
+        key = get_key(request)
+        if key is None:
+            return method(self, request, *args, **kwargs)
+        record = begin(request.user.id, key, make_fingerprint(request))
+        if record is not None:
+            return replay(record)
+        try:
+            response = self.finalize_response(request, method(self, request, *args, **kwargs), *args, **kwargs)
+            response.render()
+        except BaseException:
+            abandon(request.user.id, key)
+            raise
+        complete(request.user.id, key, response)
+        return response
+    return inner
+
+def aidempotent(method):
+    """
+    Async version of idempotent() for the handlers of todo.async_views.
+    """
+    @wraps(method)
+    async def inner(self, request, *args, **kwargs):
+        key = get_key(request)
+        if key is None:
+            return await method(self, request, *args, **kwargs)
+        record = await abegin(request.user.id, key, make_fingerprint(request))
+        if record is not None:
+            return replay(record)
+        try:
+            response = await method(self, request, *args, **kwargs)
+        except BaseException:
+            await sync_to_async(abandon)(request.user.id, key)
+            raise
+        await sync_to_async(complete)(request.user.id, key, response)
+        return response
+    return inner
+
+def purge_records():
+    """
+    Drops the records older than IDEMPOTENCY_KEY_TTL_SECONDS.
+    """
+    cutoff = timezone.now() - timedelta(seconds = settings.IDEMPOTENCY_KEY_TTL_SECONDS)
+    deleted, _ = IdempotencyRecord.objects.filter(created__lt = cutoff).delete()
+    return deleted
@@ -0,0 +1,198 @@
+import json
+import math
+import tempfile
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import AccessToken
+
+from authentication.models import User
+from todo.models import Task
+from todo.renderers import ColumnarTaskRenderer
+
+DEFAULT_BASELINE = Path(settings.BASE_DIR) / 'bench_baseline.json'
+
+def percentile(values, percent):
+    """
+    Nearest-rank percentile of a sorted list.
+    """
+    rank = max(1, math.ceil(percent / 100 * len(values)))
+    return values[rank - 1]
+
+class Command(BaseCommand):
+    help = (
+        'Seeds a throwaway test database, drives every endpoint through the Django test client and '
+        'reports latency percentiles, queries and bytes per request as JSON. '
+        'Fails when the numbers regress against the committed baseline.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10, help='Number of users to seed')
+        parser.add_argument('--tasks', type=int, default=100, help='Number of tasks to seed per user')
+        parser.add_argument('--requests', type=int, default=30, help='Number of requests per endpoint')
+        parser.add_argument('--baseline', default=str(DEFAULT_BASELINE), help='Baseline file to compare against')
+        parser.add_argument('--write-baseline', action='store_true', help='Store the results as the new baseline')
+        parser.add_argument(
+            '--tolerance', type=float, default=0.5,
+            help='Allowed relative increase of response bytes, and of p95 latency with --check-latency, over the baseline',
+        )
+        parser.add_argument(
+            '--check-latency', action='store_true',
+            help='Also fail on p95 latency, only meaningful against a baseline taken on the same machine',
+        )
+        parser.add_argument(
+            '--latency-slack-ms', type=float, default=5,
+            help='Allowed absolute increase of p95 latency, whichever of this and the tolerance is larger',
+        )
+
+    def handle(self, *args, **options):
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            # Every request comes from one client, throttling would reject most of them.
+            # Seeded users reuse the ids of earlier runs, so the tasks cache starts empty.
+            with tempfile.TemporaryDirectory() as cache_dir, override_settings(
+                THROTTLING = {**settings.THROTTLING, 'ENABLED': False},
+                CACHES = {**settings.CACHES, 'tasks': {**settings.CACHES['tasks'], 'LOCATION': cache_dir}},
+            ):
+                results = self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        report = {
+            'config': {key: options[key] for key in ('users', 'tasks', 'requests')},
+            'endpoints': results,
+        }
+        self.stdout.write(json.dumps(report, indent=2))
+
+        baseline_path = Path(options['baseline'])
+        if options['write_baseline']:
+            baseline_path.write_text(json.dumps(report, indent=2) + '\n')
+            return
+        if not baseline_path.exists():
+            self.stderr.write('No baseline at %s, run with --write-baseline to create one' % baseline_path)
+            return
+        baseline = json.loads(baseline_path.read_text())
+        mismatch = self.config_mismatch(baseline, report)
+        if mismatch:
+            self.stderr.write('Not comparing against %s, it was run with %s' % (
+                baseline_path, ' '.join('--%s %s' % (key, expected) for key, expected in mismatch.items()),
+            ))
+            return
+        regressions = self.compare(
+            baseline, report, options['tolerance'],
+            latency_slack_ms = options['latency_slack_ms'] if options['check_latency'] else None,
+        )
+        if regressions:
+            raise CommandError('Benchmark regressions:\n' + '\n'.join(regressions))
+
+    def seed(self, options):
+        # Every seeded user shares one precomputed hash, seeding should not pay for PBKDF2
+        password = make_password('password')
+        users = User.objects.bulk_create([
+            User(email='bench%d@example.com' % i, name='Bench %d' % i, password=password)
+            for i in range(options['users'])
+        ])
+        Task.objects.bulk_create([
+            Task(title='Task %d' % i, description='Description of task %d' % i, user=user)
+            for user in users for i in range(options['tasks'])
+        ])
+        return users
+
+    def run(self, options):
+        users = self.seed(options)
+        client = Client()
+        user = users[0]
+        headers = {'Authorization': 'Bearer %s' % AccessToken.for_user(user)}
+        task_ids = list(Task.objects.filter(user=user).order_by('id').values_list('id', flat=True))
+        created_ids = []
+        count = options['requests']
+
+        def register(i):
+            data = {'name': 'New', 'email': 'new%d@example.com' % i, 'password': 'password', 'password_check': 'password'}
+            return client.post('/users/register', data, content_type='application/json')
+
+        def login(i):
+            data = {'email': users[i % len(users)].email, 'password': 'password'}
+            return client.post('/users/login', data, content_type='application/json')
+
+        def create(i):
+            data = {'title': 'Created %d' % i, 'description': 'Created by the benchmark'}
+            response = client.post('/tasks', data, content_type='application/json', headers=headers)
+            created_ids.append(json.loads(response.content)['data']['id'])
+            return response
+
+        def update(i):
+            data = {'title': 'Updated %d' % i, 'description': 'Updated by the benchmark', 'status': Task.TaskStatus.IN_PROGRESS}
+            return client.put('/tasks/%d' % task_ids[i % len(task_ids)], data, content_type='application/json', headers=headers)
+
+        endpoints = {
+            'register': (register, 201),
+            'login': (login, 200),
+            # A distinct query string per request misses the tasks cache, so the lists are queried and rendered
+            'list': (lambda i: client.get('/tasks?nocache=%d' % i, headers=headers), 200),
+            'list_columnar': (lambda i: client.get('/tasks?nocache=%d' % i, headers={**headers, 'Accept': ColumnarTaskRenderer.media_type}), 200),
+            'create': (create, 201),
+            'detail': (lambda i: client.get('/tasks/%d' % task_ids[i % len(task_ids)], headers=headers), 200),
+            'update': (update, 200),
+            'delete': (lambda i: client.delete('/tasks/%d' % created_ids[i], headers=headers), 200),
+        }
+        return {
+            name: self.measure(request, expected_status, count)
+            for name, (request, expected_status) in endpoints.items()
+        }
+
+    def measure(self, request, expected_status, count):
+        latencies = []
+        queries = 0
+        size = 0
+        for i in range(count):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = request(i)
+                latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code != expected_status:
+                raise CommandError('Unexpected %s response: %s' % (response.status_code, response.content[:200]))
+            queries += len(captured)
+            size += len(response.content)
+        latencies.sort()
+        return {
+            'p50_ms': round(percentile(latencies, 50), 3),
+            'p95_ms': round(percentile(latencies, 95), 3),
+            'p99_ms': round(percentile(latencies, 99), 3),
+            'queries': round(queries / count, 2),
+            'bytes': round(size / count, 1),
+        }
+
+    def config_mismatch(self, baseline, report):
+        """
+        The baseline settings differing from the ones of the report. Per request
+        figures only compare at the same settings, e.g. the one time queries of
+        a run are spread over its request count.
+        """
+        expected = baseline.get('config', {})
+        return {key: expected.get(key) for key, value in report['config'].items() if expected.get(key) != value}
+
+    def compare(self, baseline, report, tolerance, latency_slack_ms=None):
+        """
+        Queries and bytes are deterministic and always compared. Wall clock p95
+        at the millisecond scale is mostly noise, so it is only compared when
+        latency_slack_ms is given, and must then grow by more than that too.
+        """
+        regressions = []
+        for name, result in report['endpoints'].items():
+            expected = baseline.get('endpoints', {}).get(name)
+            if expected is None:
+                continue
+            if result['queries'] > expected['queries']:
+                regressions.append('%s: %s queries per request, baseline %s' % (name, result['queries'], expected['queries']))
+            if result['bytes'] > expected['bytes'] * (1 + tolerance):
+                regressions.append('%s: bytes %s, baseline %s' % (name, result['bytes'], expected['bytes']))
+            if latency_slack_ms is not None and result['p95_ms'] > expected['p95_ms'] + max(expected['p95_ms'] * tolerance, latency_slack_ms):
+                regressions.append('%s: p95_ms %s, baseline %s' % (name, result['p95_ms'], expected['p95_ms']))
+        return regressions
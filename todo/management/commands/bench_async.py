@@ -0,0 +1,65 @@
+import asyncio
+import json
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import AsyncClient, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from authentication.models import User
+from todo.models import Task
+
+class Command(BaseCommand):
+    help = (
+        'Compares the sync DRF task views with the native async ones (todo.asgi_urls) '
+        'by driving them through AsyncClient at several levels of concurrency, on a throwaway test database'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 100, 1000], help='In-flight requests per round')
+        parser.add_argument('--tasks', type=int, default=200, help='Number of tasks to seed')
+
+    def handle(self, *args, **options):
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            user = User.objects.create_user(email='bench@example.com', name='Bench', password='password')
+            Task.objects.bulk_create([
+                Task(title='Task %d' % i, description='Description %d' % i, user=user) for i in range(options['tasks'])
+            ])
+            headers = {'Authorization': 'Bearer %s' % AccessToken.for_user(user)}
+            results = {}
+            for urlconf in ['todo.urls', 'todo.asgi_urls']:
+                # Every request comes from one client, throttling would reject most of them
+                throttling = {**settings.THROTTLING, 'ENABLED': False}
+                with override_settings(ROOT_URLCONF=urlconf, THROTTLING=throttling):
+                    results[urlconf] = {
+                        concurrency: asyncio.run(self.run_round(concurrency, headers))
+                        for concurrency in options['concurrency']
+                    }
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+        self.stdout.write(json.dumps(results, indent=2))
+
+    async def run_round(self, concurrency, headers):
+        client = AsyncClient()
+        paths = ['/tasks?page_size=20', '/tasks/1']
+
+        async def timed(i):
+            started = time.perf_counter()
+            response = await client.get(paths[i % len(paths)], headers=headers)
+            assert response.status_code == 200, response.content
+            return time.perf_counter() - started
+
+        # one warm up request so both sides start with the same caches
+        await timed(0)
+        started = time.perf_counter()
+        latencies = sorted(await asyncio.gather(*(timed(i) for i in range(concurrency))))
+        elapsed = time.perf_counter() - started
+        return {
+            'requests_per_second': round(concurrency / elapsed, 1),
+            'p50_ms': round(statistics.median(latencies) * 1000, 2),
+            'p99_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 2),
+        }
@@ -0,0 +1,71 @@
+import json
+import timeit
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.response import Response
+
+from todo.models import Task
+from todo.renderers import ColumnarTaskRenderer, TaskRenderer
+
+def legacy_render(data):
+    """
+    The renderer as it used to be: stringify the payload to sniff for errors, then dump it again.
+    """
+    if 'ErrorDetail' in str(data):
+        return json.dumps({ 'errors' : data })
+    return json.dumps(data)
+
+class StdlibTaskRenderer(TaskRenderer):
+    use_fast_encoder = False
+
+class Command(BaseCommand):
+    help = 'Benchmarks the task renderers on a large task list payload, row objects against columns'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help='Number of tasks in the payload')
+        parser.add_argument('--repeat', type=int, default=20, help='Number of renders to time')
+
+    def handle(self, *args, **options):
+        now = timezone.now().isoformat()
+        payload = {
+            'data': [
+                {
+                    'id': i,
+                    'title': 'Task %d' % i,
+                    'description': 'Description of task number %d with some more text' % i,
+                    'status': Task.TaskStatus.PENDING,
+                    'user': 1,
+                    'created': now,
+                }
+                for i in range(options['rows'])
+            ],
+            'next': None,
+            'prev': None,
+        }
+        fields = list(payload['data'][0]) if payload['data'] else []
+        rows = [tuple(task.values()) for task in payload['data']]
+        context = {'response': Response(status=200)}
+
+        def render_columnar():
+            # Timed from value tuples, as the task list view builds it from values_list()
+            columns, dictionaries = ColumnarTaskRenderer.build_columns(fields, rows)
+            data = {'columns': columns, 'dictionaries': dictionaries, 'next': None, 'prev': None}
+            return ColumnarTaskRenderer().render(data, renderer_context=context)
+
+        candidates = {
+            'legacy': lambda: legacy_render(payload),
+            'stdlib': lambda: StdlibTaskRenderer().render(payload, renderer_context=context),
+        }
+        if TaskRenderer.use_fast_encoder:
+            candidates['orjson'] = lambda: TaskRenderer().render(payload, renderer_context=context)
+        candidates['columnar'] = render_columnar
+
+        results = {}
+        for name, render in candidates.items():
+            seconds = min(timeit.repeat(render, number=1, repeat=options['repeat']))
+            results[name] = {'ms': round(seconds * 1000, 3), 'bytes': len(render())}
+        baseline = results['legacy']['ms']
+        for result in results.values():
+            result['speedup'] = round(baseline / result['ms'], 2) if result['ms'] else None
+        self.stdout.write(json.dumps({'rows': options['rows'], 'results': results}, indent=2))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from todo import schema
+
+class Command(BaseCommand):
+    help = 'Writes the OpenAPI spec served by /swagger/ to OPENAPI_SCHEMA_DIR, run it after changing any view'
+
+    def handle(self, *args, **options):
+        for path in schema.write_artifacts():
+            self.stdout.write('Wrote %s' % path)
@@ -0,0 +1,11 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from todo import idempotency
+
+class Command(BaseCommand):
+    help = 'Removes the Idempotency-Key records older than IDEMPOTENCY_KEY_TTL_SECONDS'
+
+    def handle(self, *args, **options):
+        deleted = idempotency.purge_records()
+        self.stdout.write('Removed %d idempotency records older than %d seconds' % (deleted, settings.IDEMPOTENCY_KEY_TTL_SECONDS))
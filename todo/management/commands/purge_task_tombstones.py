@@ -0,0 +1,11 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from todo import sync
+
+class Command(BaseCommand):
+    help = 'Removes the task deletion log entries older than TASK_TOMBSTONE_RETENTION_DAYS'
+
+    def handle(self, *args, **options):
+        deleted = sync.purge_tombstones()
+        self.stdout.write('Removed %d tombstones older than %d days' % (deleted, settings.TASK_TOMBSTONE_RETENTION_DAYS))
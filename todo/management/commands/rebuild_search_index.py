@@ -0,0 +1,16 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from todo import search
+
+class Command(BaseCommand):
+    help = 'Rebuilds the full text search index of tasks from the task table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help='Database alias to rebuild the index of')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        search.rebuild_index(options['database'])
+        self.stdout.write('Rebuilt %s in %.1fms' % (search.FTS_TABLE, (time.perf_counter() - started) * 1000))
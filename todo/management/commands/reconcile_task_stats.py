@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from todo import stats
+
+class Command(BaseCommand):
+    help = 'Recounts the tasks of every user and repairs the task status counters that drifted'
+
+    def handle(self, *args, **options):
+        repaired = stats.reconcile()
+        self.stdout.write('Repaired the task counters of %d users%s' % (
+            len(repaired), (': %s' % ', '.join(str(user_id) for user_id in repaired)) if repaired else '',
+        ))
@@ -0,0 +1,27 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from todo import routers
+
+class Command(BaseCommand):
+    help = (
+        'Copies the primary database into every read replica (DATABASE_REPLICAS) with the SQLite backup API, '
+        'once or every --interval seconds'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, help='Keep syncing every INTERVAL seconds')
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError('No read replica configured, set DB_REPLICA_PATH')
+        while True:
+            started = time.perf_counter()
+            for alias in settings.DATABASE_REPLICAS:
+                routers.sync_replica(alias)
+            self.stdout.write('Synced %s in %.1fms' % (', '.join(settings.DATABASE_REPLICAS), (time.perf_counter() - started) * 1000))
+            if options['interval'] is None:
+                return
+            time.sleep(options['interval'])
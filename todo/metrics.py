@@ -0,0 +1,187 @@
+import glob
+import json
+import math
+import mmap
+import os
+import struct
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+
+INITIAL_FILE_SIZE = 1 << 16
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+def entry_positions(data, used):
+    """
+    Yields (key, value, value position) of the entries of a metrics file.
+
+    Layout: a 4 byte used size and 4 bytes of padding, then one entry per
+    sample: 4 byte key length, the utf-8 key padded to 8 bytes and a double.
+    """
+    position = 8
+    while position < used:
+        length = struct.unpack_from('i', data, position)[0]
+        key_start = position + 4
+        key = bytes(data[key_start:key_start + length]).decode('utf-8')
+        value_position = key_start + length + (8 - (length + 4) % 8)
+        yield key, struct.unpack_from('d', data, value_position)[0], value_position
+        position = value_position + 8
+
+class MmapValues:
+    """
+    Sample values of one process, kept in an mmap-backed file so any worker
+    can aggregate the values of all the others without a metrics service.
+    Only the owning process writes to its file.
+    """
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._file = open(path, 'a+b')
+        if os.fstat(self._file.fileno()).st_size == 0:
+            self._file.truncate(INITIAL_FILE_SIZE)
+        self._capacity = os.fstat(self._file.fileno()).st_size
+        self._mmap = mmap.mmap(self._file.fileno(), self._capacity)
+        self._used = struct.unpack_from('i', self._mmap, 0)[0] or 8
+        self._positions = {key: position for key, _, position in entry_positions(self._mmap, self._used)}
+
+    def inc(self, key, amount):
+        with self._lock:
+            position = self._positions.get(key)
+            if position is None:
+                position = self._add_key(key)
+            value = struct.unpack_from('d', self._mmap, position)[0]
+            struct.pack_into('d', self._mmap, position, value + amount)
+
+    def _add_key(self, key):
+        encoded = key.encode('utf-8')
+        padded = encoded + b' ' * (8 - (len(encoded) + 4) % 8)
+        entry = struct.pack('i%dsd' % len(padded), len(encoded), padded, 0.0)
+        while self._used + len(entry) > self._capacity:
+            self._capacity *= 2
+            self._file.truncate(self._capacity)
+            self._mmap.close()
+            self._mmap = mmap.mmap(self._file.fileno(), self._capacity)
+        self._mmap[self._used:self._used + len(entry)] = entry
+        self._used += len(entry)
+        # Publish the entry to readers only once it is fully written
+        struct.pack_into('i', self._mmap, 0, self._used)
+        self._positions[key] = self._used - 8
+        return self._used - 8
+
+    def close(self):
+        self._mmap.close()
+        self._file.close()
+
+_values = None
+_values_lock = threading.Lock()
+
+def get_metrics_dir():
+    return str(settings.METRICS_DIR)
+
+def process_values():
+    """
+    The values file of the current process, reopened after a fork or a change of METRICS_DIR.
+    """
+    global _values
+    pid, directory = os.getpid(), get_metrics_dir()
+    if _values is None or _values[:2] != (pid, directory):
+        with _values_lock:
+            if _values is None or _values[:2] != (pid, directory):
+                os.makedirs(directory, exist_ok=True)
+                _values = (pid, directory, MmapValues(os.path.join(directory, 'metrics_%d.db' % pid)))
+    return _values[2]
+
+def sample_key(name, labels):
+    return json.dumps([name, labels], sort_keys=True)
+
+def collect(directory=None):
+    """
+    Sums the samples of every process file in the metrics directory.
+    """
+    totals = defaultdict(float)
+    for path in glob.glob(os.path.join(directory or get_metrics_dir(), 'metrics_*.db')):
+        with open(path, 'rb') as f:
+            data = f.read()
+        if len(data) < 8:
+            continue
+        for key, value, _ in entry_positions(data, struct.unpack_from('i', data, 0)[0]):
+            totals[key] += value
+    return totals
+
+REGISTRY = []
+
+class Counter:
+    type = 'counter'
+
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        REGISTRY.append(self)
+
+    def inc(self, amount=1, **labels):
+        process_values().inc(sample_key(self.name + '_total', labels), amount)
+
+class Histogram:
+    type = 'histogram'
+
+    def __init__(self, name, documentation, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = [*buckets, math.inf]
+        REGISTRY.append(self)
+
+    def observe(self, value, **labels):
+        values = process_values()
+        # Buckets are cumulative, so every bucket at or above the value counts it
+        for bound in self.buckets:
+            if value <= bound:
+                values.inc(sample_key(self.name + '_bucket', {**labels, 'le': format_bound(bound)}), 1)
+        values.inc(sample_key(self.name + '_sum', labels), value)
+        values.inc(sample_key(self.name + '_count', labels), 1)
+
+def format_bound(bound):
+    return '+Inf' if bound == math.inf else repr(float(bound))
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    pairs = ('%s="%s"' % (name, str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n'))
+             for name, value in sorted(labels.items()))
+    return '{%s}' % ','.join(pairs)
+
+def exposition(totals=None):
+    """
+    Renders the aggregated samples in the Prometheus text format.
+    """
+    totals = collect() if totals is None else totals
+    samples = defaultdict(list)
+    for key, value in totals.items():
+        name, labels = json.loads(key)
+        samples[name].append((labels, value))
+
+    lines = []
+    for metric in REGISTRY:
+        lines.append('# HELP %s %s' % (metric.name, metric.documentation))
+        lines.append('# TYPE %s %s' % (metric.name, metric.type))
+        suffixes = ['_total'] if metric.type == 'counter' else ['_bucket', '_sum', '_count']
+        for suffix in suffixes:
+            for labels, value in sorted(samples.get(metric.name + suffix, []), key=sample_order):
+                lines.append('%s%s%s %s' % (metric.name, suffix, format_labels(labels), repr(value)))
+    return '\n'.join(lines) + '\n'
+
+def sample_order(sample):
+    labels, _ = sample
+    le = labels.get('le')
+    bound = math.inf if le == '+Inf' else float(le) if le else 0
+    return sorted((name, value) for name, value in labels.items() if name != 'le'), bound
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+http_requests = Counter('todo_http_requests', 'HTTP requests by url name, method and status code.')
+http_request_duration = Histogram('todo_http_request_duration_seconds', 'HTTP request latency by url name.', LATENCY_BUCKETS)
+db_queries = Histogram('todo_db_queries_per_request', 'Database queries run by one request, by url name.', (0, 1, 2, 3, 5, 10, 25, 50))
+db_duration = Histogram('todo_db_duration_seconds', 'Time one request spent in database queries, by url name.', LATENCY_BUCKETS)
+cache_requests = Counter('todo_cache_requests', 'Cache lookups by cache and result (hit or miss).')
+password_hash_duration = Histogram('todo_password_hash_duration_seconds', 'Latency of password hashing on the hashing pool.', (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5))
+password_hash_rejected = Counter('todo_password_hash_rejected', 'Password hashing calls rejected by the saturated hashing pool.')
+throttled_requests = Counter('todo_throttled_requests', 'Requests rejected by a throttle, by throttle scope.')
@@ -0,0 +1,77 @@
+import json
+import logging
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from todo import metrics, timing
+
+logger = logging.getLogger('todo.timing')
+
+class ServerTimingMiddleware:
+    """
+    Times the phases of each request (authentication, database, serializers,
+    rendering) and reports them in a Server-Timing header, a structured log
+    line on the `todo.timing` logger and the /metrics histograms.
+    """
+    sync_capable = True
+    async_capable = True
+    phases = ('auth', 'db', 'serialize', 'render')
+    # Any other method a client sends is counted as 'other', each would add series
+    methods = frozenset(('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS', 'TRACE', 'CONNECT'))
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings, token = timing.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            timing.stop(token)
+        return self.report(request, response, timings)
+
+    async def __acall__(self, request):
+        timings, token = timing.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            timing.stop(token)
+        return self.report(request, response, timings)
+
+    def report(self, request, response, timings):
+        total = timings.total()
+        entries = []
+        for name in self.phases:
+            if name in timings.durations:
+                entry = '%s;dur=%.2f' % (name, timings.durations[name] * 1000)
+                if name == 'db':
+                    entry += ';desc="%d queries"' % timings.db_queries
+                entries.append(entry)
+        entries.append('total;dur=%.2f' % (total * 1000))
+        response['Server-Timing'] = ', '.join(entries)
+
+        match = getattr(request, 'resolver_match', None)
+        view = match.url_name if match else None
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'view': view,
+            'status': response.status_code,
+            'total_ms': round(total * 1000, 2),
+            'db_queries': timings.db_queries,
+            **{'%s_ms' % name: round(timings.durations.get(name, 0.0) * 1000, 2) for name in self.phases},
+        }))
+        self.observe(request, response, view or 'unmatched', total, timings)
+        return response
+
+    def observe(self, request, response, view, total, timings):
+        # Labelled by url name rather than path, so the number of series stays bounded
+        method = request.method if request.method in self.methods else 'other'
+        metrics.http_requests.inc(view = view, method = method, status = response.status_code)
+        metrics.http_request_duration.observe(total, view = view)
+        metrics.db_queries.observe(timings.db_queries, view = view)
+        metrics.db_duration.observe(timings.durations.get('db', 0.0), view = view)
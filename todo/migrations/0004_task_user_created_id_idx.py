@@ -0,0 +1,19 @@
+# Generated by Django 5.0.6 on 2026-10-18 03:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0003_alter_task_title'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['user', 'created', 'id'], name='task_user_created_id_idx'),
+        ),
+    ]
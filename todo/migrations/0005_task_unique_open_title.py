@@ -0,0 +1,54 @@
+# Generated by Django 5.0.6 on 2026-10-18 03:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def rename_duplicate_open_titles(apps, schema_editor):
+    """
+    The old lookup-then-insert check raced, so a user may already have several
+    non complete tasks with one title. The oldest keeps it and the others are
+    renamed "<title> (2)", "<title> (3)"..., so the unique index can be built
+    without losing any task.
+    """
+    Task = apps.get_model('todo', 'Task')
+    max_length = Task._meta.get_field('title').max_length
+    duplicates = (
+        Task.objects.exclude(status='COMPLETED').values('user_id', 'title')
+        .annotate(count=models.Count('id')).filter(count__gt=1)
+    )
+    for duplicate in duplicates:
+        taken = set(Task.objects.filter(user_id=duplicate['user_id']).exclude(status='COMPLETED').values_list('title', flat=True))
+        tasks = (
+            Task.objects.filter(user_id=duplicate['user_id'], title=duplicate['title'])
+            .exclude(status='COMPLETED').order_by('id').values_list('id', flat=True)
+        )
+        number = 1
+        for task_id in list(tasks)[1:]:
+            title = duplicate['title']
+            while title in taken:
+                number += 1
+                suffix = ' (%d)' % number
+                title = duplicate['title'][:max_length - len(suffix)] + suffix
+            taken.add(title)
+            Task.objects.filter(id=task_id).update(title=title)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0004_task_user_created_id_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['user', 'title'], name='task_user_title_idx'),
+        ),
+        migrations.RunPython(rename_duplicate_open_titles, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='task',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'COMPLETED'), _negated=True), fields=('user', 'title'), name='task_unique_open_title', violation_error_message='There is already a non complete task'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.6 on 2026-10-18 03:36
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0005_task_unique_open_title'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['user', 'updated', 'id'], name='task_user_updated_id_idx'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+from django.db import migrations
+
+# External content FTS5 index over the task title and description, see todo/search.py.
+# The triggers keep it in sync with every write, including QuerySet.update() and
+# bulk_create() which send no signals.
+CREATE_SQL = [
+    """
+    CREATE VIRTUAL TABLE todo_task_fts USING fts5(
+        title, description, content='todo_task', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER todo_task_fts_insert AFTER INSERT ON todo_task BEGIN
+        INSERT INTO todo_task_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER todo_task_fts_delete AFTER DELETE ON todo_task BEGIN
+        INSERT INTO todo_task_fts(todo_task_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER todo_task_fts_update AFTER UPDATE OF title, description ON todo_task BEGIN
+        INSERT INTO todo_task_fts(todo_task_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO todo_task_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+    "INSERT INTO todo_task_fts(todo_task_fts) VALUES ('rebuild')",
+]
+
+DROP_SQL = [
+    'DROP TRIGGER todo_task_fts_update',
+    'DROP TRIGGER todo_task_fts_delete',
+    'DROP TRIGGER todo_task_fts_insert',
+    'DROP TABLE todo_task_fts',
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0007_task_list_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_SQL, DROP_SQL),
+    ]
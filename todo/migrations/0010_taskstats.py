@@ -0,0 +1,78 @@
+# Generated by Django 5.0.6 on 2026-10-18 04:01
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# Counting triggers of todo_taskstats, see todo/stats.py. They run in the
+# transaction of every task write, including QuerySet.update(), bulk_create()
+# and cascades, so the counters cannot miss a code path.
+CREATE_SQL = [
+    """
+    CREATE TRIGGER todo_taskstats_insert AFTER INSERT ON todo_task BEGIN
+        INSERT INTO todo_taskstats (user_id, pending, in_progress, completed)
+        VALUES (new.user_id, new.status = 'PENDING', new.status = 'IN_PROGRESS', new.status = 'COMPLETED')
+        ON CONFLICT (user_id) DO UPDATE SET
+            pending = pending + excluded.pending,
+            in_progress = in_progress + excluded.in_progress,
+            completed = completed + excluded.completed;
+    END
+    """,
+    """
+    CREATE TRIGGER todo_taskstats_delete AFTER DELETE ON todo_task BEGIN
+        UPDATE todo_taskstats SET
+            pending = pending - (old.status = 'PENDING'),
+            in_progress = in_progress - (old.status = 'IN_PROGRESS'),
+            completed = completed - (old.status = 'COMPLETED')
+        WHERE user_id = old.user_id;
+    END
+    """,
+    """
+    CREATE TRIGGER todo_taskstats_update AFTER UPDATE OF status, user_id ON todo_task
+    WHEN old.status IS NOT new.status OR old.user_id IS NOT new.user_id BEGIN
+        UPDATE todo_taskstats SET
+            pending = pending - (old.status = 'PENDING'),
+            in_progress = in_progress - (old.status = 'IN_PROGRESS'),
+            completed = completed - (old.status = 'COMPLETED')
+        WHERE user_id = old.user_id;
+        INSERT INTO todo_taskstats (user_id, pending, in_progress, completed)
+        VALUES (new.user_id, new.status = 'PENDING', new.status = 'IN_PROGRESS', new.status = 'COMPLETED')
+        ON CONFLICT (user_id) DO UPDATE SET
+            pending = pending + excluded.pending,
+            in_progress = in_progress + excluded.in_progress,
+            completed = completed + excluded.completed;
+    END
+    """,
+    """
+    INSERT INTO todo_taskstats (user_id, pending, in_progress, completed)
+    SELECT user_id, SUM(status = 'PENDING'), SUM(status = 'IN_PROGRESS'), SUM(status = 'COMPLETED')
+    FROM todo_task GROUP BY user_id
+    """,
+]
+
+DROP_SQL = [
+    'DROP TRIGGER todo_taskstats_update',
+    'DROP TRIGGER todo_taskstats_delete',
+    'DROP TRIGGER todo_taskstats_insert',
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0001_initial'),
+        ('todo', '0009_tasktombstone'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('pending', models.IntegerField(default=0)),
+                ('in_progress', models.IntegerField(default=0)),
+                ('completed', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunSQL(CREATE_SQL, DROP_SQL),
+    ]
@@ -0,0 +1,44 @@
+from django.db import migrations
+
+# The deletion log of todo/sync.py is written by triggers, so a bulk
+# QuerySet.delete() stays one DELETE statement and logs every row it removes.
+# The timestamp is formatted the way Django stores datetimes in SQLite
+# (str() of a naive UTC datetime, no fraction when it is zero), so it
+# compares correctly against the positions of sync tokens.
+NOW_SQL = """
+    CASE WHEN substr(strftime('%f', 'now'), 4) = '000'
+        THEN strftime('%Y-%m-%d %H:%M:%S', 'now')
+        ELSE strftime('%Y-%m-%d %H:%M:%f', 'now') || '000'
+    END
+"""
+
+CREATE_SQL = [
+    """
+    CREATE TRIGGER todo_tasktombstone_task_delete AFTER DELETE ON todo_task BEGIN
+        INSERT INTO todo_tasktombstone (user_id, task_id, deleted) VALUES (old.user_id, old.id, %s);
+    END
+    """ % NOW_SQL,
+    # Tasks deleted along with their user have nobody left to sync them
+    """
+    CREATE TRIGGER todo_tasktombstone_user_delete AFTER DELETE ON authentication_user BEGIN
+        DELETE FROM todo_tasktombstone WHERE user_id = old.id;
+    END
+    """,
+]
+
+DROP_SQL = [
+    'DROP TRIGGER todo_tasktombstone_user_delete',
+    'DROP TRIGGER todo_tasktombstone_task_delete',
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0001_initial'),
+        ('todo', '0011_idempotencyrecord'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_SQL, DROP_SQL),
+    ]
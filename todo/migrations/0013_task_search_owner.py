@@ -0,0 +1,82 @@
+from django.db import migrations
+
+# Adds an owner column to the search index holding a `u<user id>` token, so a
+# search matches `owner:"u<id>"` and FTS5 only reads the entries of one user
+# instead of ranking the matches of every account, see todo/search.py.
+# todo_task has no such column, the index takes its content from a view.
+CREATE_SQL = [
+    'DROP TRIGGER todo_task_fts_update',
+    'DROP TRIGGER todo_task_fts_delete',
+    'DROP TRIGGER todo_task_fts_insert',
+    'DROP TABLE todo_task_fts',
+    """
+    CREATE VIEW todo_task_fts_content AS
+        SELECT id, title, description, 'u' || user_id AS owner FROM todo_task
+    """,
+    """
+    CREATE VIRTUAL TABLE todo_task_fts USING fts5(
+        title, description, owner, content='todo_task_fts_content', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER todo_task_fts_insert AFTER INSERT ON todo_task BEGIN
+        INSERT INTO todo_task_fts(rowid, title, description, owner) VALUES (new.id, new.title, new.description, 'u' || new.user_id);
+    END
+    """,
+    """
+    CREATE TRIGGER todo_task_fts_delete AFTER DELETE ON todo_task BEGIN
+        INSERT INTO todo_task_fts(todo_task_fts, rowid, title, description, owner)
+            VALUES ('delete', old.id, old.title, old.description, 'u' || old.user_id);
+    END
+    """,
+    """
+    CREATE TRIGGER todo_task_fts_update AFTER UPDATE OF title, description, user_id ON todo_task BEGIN
+        INSERT INTO todo_task_fts(todo_task_fts, rowid, title, description, owner)
+            VALUES ('delete', old.id, old.title, old.description, 'u' || old.user_id);
+        INSERT INTO todo_task_fts(rowid, title, description, owner) VALUES (new.id, new.title, new.description, 'u' || new.user_id);
+    END
+    """,
+    "INSERT INTO todo_task_fts(todo_task_fts) VALUES ('rebuild')",
+]
+
+DROP_SQL = [
+    'DROP TRIGGER todo_task_fts_update',
+    'DROP TRIGGER todo_task_fts_delete',
+    'DROP TRIGGER todo_task_fts_insert',
+    'DROP TABLE todo_task_fts',
+    'DROP VIEW todo_task_fts_content',
+    """
+    CREATE VIRTUAL TABLE todo_task_fts USING fts5(
+        title, description, content='todo_task', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER todo_task_fts_insert AFTER INSERT ON todo_task BEGIN
+        INSERT INTO todo_task_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER todo_task_fts_delete AFTER DELETE ON todo_task BEGIN
+        INSERT INTO todo_task_fts(todo_task_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER todo_task_fts_update AFTER UPDATE OF title, description ON todo_task BEGIN
+        INSERT INTO todo_task_fts(todo_task_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO todo_task_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+    "INSERT INTO todo_task_fts(todo_task_fts) VALUES ('rebuild')",
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0012_task_tombstone_triggers'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_SQL, DROP_SQL),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 from authentication.models import User
 
@@ -24,3 +25,83 @@ class Task(models.Model):
 
     objects = models.Manager()
     REQUIRED_FIELDS = ['title', 'description']
+
+    class Meta:
+        constraints = [
+            # A user cannot have two non complete tasks with the same title
+            models.UniqueConstraint(
+                fields=['user', 'title'],
+                condition=~models.Q(status='COMPLETED'),
+                name='task_unique_open_title',
+                violation_error_message='There is already a non complete task',
+            ),
+        ]
+        # Every filter and ordering of task lists (see todo.views.filter_tasks and
+        # todo.pagination) seeks one of these, (user, <ordering>, id) and
+        # (user, status, <ordering>, id) for each ordering field.
+        indexes = [
+            models.Index(fields=['user', 'created', 'id'], name='task_user_created_id_idx'),
+            models.Index(fields=['user', 'title', 'id'], name='task_user_title_id_idx'),
+            # Also backs the max(updated) validator of task lists, see todo.conditional
+            models.Index(fields=['user', 'updated', 'id'], name='task_user_updated_id_idx'),
+            models.Index(fields=['user', 'status', 'created', 'id'], name='task_user_status_created_idx'),
+            models.Index(fields=['user', 'status', 'title', 'id'], name='task_user_status_title_idx'),
+            models.Index(fields=['user', 'status', 'updated', 'id'], name='task_user_status_updated_idx'),
+        ]
+
+class TaskTombstone(models.Model):
+    """
+    Deletion log of tasks, read by the changes endpoint so clients can drop
+    deleted tasks without downloading the whole list. Entries older than
+    TASK_TOMBSTONE_RETENTION_DAYS are removed by purge_task_tombstones.
+    """
+    id = models.AutoField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    task_id = models.IntegerField()
+    deleted = models.DateTimeField(default=timezone.now)
+
+    objects = models.Manager()
+
+    class Meta:
+        indexes = [
+            # Backs the keyset seek of the changes endpoint, see todo.sync
+            models.Index(fields=['user', 'deleted', 'id'], name='tombstone_user_deleted_id_idx'),
+        ]
+
+class TaskStats(models.Model):
+    """
+    Number of tasks of a user in each status, kept up to date by triggers on
+    the task table (see the 0010 migration) so dashboards read one row
+    instead of counting. reconcile_task_stats repairs any drift.
+    """
+    user = models.OneToOneField(User, primary_key=True, on_delete=models.CASCADE)
+    pending = models.IntegerField(default=0)
+    in_progress = models.IntegerField(default=0)
+    completed = models.IntegerField(default=0)
+
+    objects = models.Manager()
+
+class IdempotencyRecord(models.Model):
+    """
+    First response to a request made with an Idempotency-Key header, replayed
+    to the retries of that request, see todo.idempotency. A record without a
+    status code is a request still being processed.
+    """
+    id = models.AutoField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    created = models.DateTimeField(default=timezone.now)
+    status_code = models.IntegerField(null=True)
+    content_type = models.CharField(max_length=255, blank=True)
+    content = models.BinaryField(null=True)
+
+    objects = models.Manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='idempotency_unique_user_key'),
+        ]
+        indexes = [
+            models.Index(fields=['created'], name='idempotency_created_idx'),
+        ]
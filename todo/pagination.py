@@ -0,0 +1,155 @@
+import base64
+import json
+from datetime import datetime
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework import exceptions
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over a unique ordering such as (created, id).
+
+    Pages are fetched with a `WHERE (created, id) > (?, ?)` style seek instead
+    of an OFFSET, so every page costs the same no matter how deep it is.
+    The cursor is an opaque base64 token holding the boundary row position.
+
+    The `ordering` query parameter picks another leading field, optionally
+    descending (`-updated`), and `id` always breaks the ties in the same direction.
+    """
+    ordering = ('created', 'id')
+    ordering_fields = ('created', 'updated', 'title')
+    page_size = 100
+    max_page_size = 1000
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    ordering_query_param = 'ordering'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.finish_page(list(self.page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        Same as paginate_queryset() for async views, with an async iteration of the page.
+        """
+        return self.finish_page([item async for item in self.page_queryset(queryset, request)])
+
+    def page_queryset(self, queryset, request):
+        """
+        Returns the queryset of the requested page, with one extra row to find
+        out whether there is a following page.
+        """
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request)
+        self.position, self.reverse = self.decode_cursor(request, queryset.model)
+
+        if self.position is not None:
+            queryset = queryset.filter(self.seek_filter(self.position, self.reverse))
+        order = [flip(field) if self.reverse else field for field in self.ordering]
+        return queryset.order_by(*order)[:self.page_size + 1]
+
+    def finish_page(self, results):
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if self.reverse:
+            results.reverse()
+
+        self.next_cursor = None
+        self.prev_cursor = None
+        if results:
+            has_next = self.position is not None if self.reverse else has_more
+            has_prev = has_more if self.reverse else self.position is not None
+            if has_next:
+                self.next_cursor = self.encode_cursor(self.get_position(results[-1]), reverse=False)
+            if has_prev:
+                self.prev_cursor = self.encode_cursor(self.get_position(results[0]), reverse=True)
+        return results
+
+    def get_paginated_response(self, data):
+        return Response({
+            'data': data,
+            'next': self.next_cursor,
+            'prev': self.prev_cursor,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'data': schema,
+                'next': {'type': 'string', 'nullable': True},
+                'prev': {'type': 'string', 'nullable': True},
+            },
+        }
+
+    def get_ordering(self, request):
+        """
+        The (field, id) ordering asked for by the `ordering` query parameter.
+        """
+        field = request.query_params.get(self.ordering_query_param)
+        if not field:
+            return type(self).ordering
+        if field.lstrip('-') not in self.ordering_fields:
+            raise exceptions.ValidationError({
+                self.ordering_query_param: ['Expected one of %s, optionally prefixed with -' % ', '.join(self.ordering_fields)]
+            })
+        return (field, '-id' if field.startswith('-') else 'id')
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def seek_filter(self, position, reverse):
+        """
+        Builds the row-value comparison `(a, b) > (x, y)` for the ordering.
+
+        The leading `a >= x` term is redundant but lets SQLite turn the seek
+        into an index range scan.
+        """
+        first, last = (field.lstrip('-') for field in self.ordering)
+        # Seeking backwards on a descending ordering moves towards larger values
+        descending = self.ordering[0].startswith('-') != reverse
+        op = 'lt' if descending else 'gt'
+        op_or_equal = 'lte' if descending else 'gte'
+        return (
+            Q(**{f'{first}__{op_or_equal}': position[0]})
+            & (Q(**{f'{first}__{op}': position[0]}) | Q(**{first: position[0], f'{last}__{op}': position[1]}))
+        )
+
+    def get_position(self, item):
+        return tuple(getattr(item, field.lstrip('-')) for field in self.ordering)
+
+    def encode_cursor(self, position, reverse):
+        values = [value.isoformat() if isinstance(value, datetime) else value for value in position]
+        payload = json.dumps({'p': values, 'o': self.ordering[0], 'r': int(reverse)}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            # A cursor only makes sense for the ordering it was taken from
+            if payload.get('o', type(self).ordering[0]) != self.ordering[0]:
+                raise ValueError
+            position = tuple(
+                model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, payload['p'], strict=True)
+            )
+            if None in position:
+                raise ValueError
+            return position, bool(payload['r'])
+        except (AttributeError, TypeError, ValueError, KeyError, UnicodeEncodeError, DjangoValidationError):
+            raise exceptions.ValidationError({self.cursor_query_param: [self.invalid_cursor_message]})
+
+def flip(field):
+    return field[1:] if field.startswith('-') else '-' + field
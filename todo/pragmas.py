@@ -0,0 +1,10 @@
+def apply_pragmas(sender, connection, **kwargs):
+    """
+    connection_created receiver running the PRAGMAS of the database settings,
+    e.g. {'journal_mode': 'WAL'}, on every new SQLite connection.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in connection.settings_dict.get('PRAGMAS', {}).items():
+            cursor.execute('PRAGMA %s = %s' % (name, value))
@@ -1,15 +1,150 @@
 from rest_framework import renderers
+from rest_framework.exceptions import ErrorDetail
+from rest_framework.utils import encoders
+import csv
+import io
+import itertools
 import json
 
-class TaskRenderer(renderers.JSONRenderer):
+from todo import timing
+from todo.models import Task
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def contains_error_detail(data):
+    """
+    Walks a payload looking for ErrorDetail values, the structural
+    replacement of searching str(data) for 'ErrorDetail'.
+    """
+    if isinstance(data, ErrorDetail):
+        return True
+    if isinstance(data, dict):
+        return any(contains_error_detail(value) for value in data.values())
+    if isinstance(data, (list, tuple)):
+        return any(contains_error_detail(value) for value in data)
+    return False
+
+class ErrorEnvelopeMixin:
+    """_summary_
+    Wraps error payloads in an `errors` key, the envelope of every api error response.
+    """
+    def is_error(self, data, renderer_context):
+        response = (renderer_context or {}).get('response')
+        if response is None:
+            return contains_error_detail(data)
+        # Views that build their own error payload already use the envelope
+        return response.status_code >= 400 and not (isinstance(data, dict) and 'errors' in data)
+
+    def envelope(self, data, renderer_context):
+        return { 'errors' : data } if self.is_error(data, renderer_context) else data
+
+class EnvelopeJSONRenderer(ErrorEnvelopeMixin, renderers.JSONRenderer):
+    """_summary_
+    Shared renderer for the api responses, error payloads are wrapped in an `errors` key.
+    The payload is encoded once, straight to UTF-8 bytes, with orjson when it is installed.
+    """
+    charset = 'utf-8'
+    use_fast_encoder = orjson is not None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        with timing.phase('render'):
+            return self.encode(self.envelope(data, renderer_context))
+
+    def encode(self, data):
+        if self.use_fast_encoder:
+            # Datetimes are passed through so they come out exactly as with the DRF encoder,
+            # and integer keys (list field errors) become strings as with the stdlib encoder
+            return orjson.dumps(
+                data, default=encoders.JSONEncoder().default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+            )
+        return json.dumps(
+            data, cls=encoders.JSONEncoder, ensure_ascii=False, separators=(',', ':')
+        ).encode('utf-8')
+
+class TaskRenderer(EnvelopeJSONRenderer):
     """_summary_
     This renderer decides how to return task response.
     """
-    charset='utf-8'
+
+class ColumnarTaskRenderer(TaskRenderer):
+    """_summary_
+    This renderer returns task lists as one array per field instead of one object per task,
+    so key names are written once per page. Low cardinality fields are dictionary encoded:
+    `{"columns": {"id": [1, 2], "status": [0, 2]}, "dictionaries": {"status": ["PENDING", ...]}}`
+    """
+    media_type = 'application/vnd.todo.columnar+json'
+    format = 'columnar'
+    dictionaries = {'status': Task.TaskStatus.values}
+
+    @classmethod
+    def build_columns(cls, fields, rows):
+        """
+        Turns value tuples, in the order of fields, into the columns and
+        dictionaries of a payload. Rows are transposed as a whole, no per
+        row object is built.
+        """
+        values = list(zip(*rows)) or [()] * len(fields)
+        columns = {}
+        for field, column in zip(fields, values):
+            if field in cls.dictionaries:
+                codes = {value: code for code, value in enumerate(cls.dictionaries[field])}
+                column = [codes[value] for value in column]
+            columns[field] = list(column)
+        dictionaries = {field: list(choices) for field, choices in cls.dictionaries.items() if field in columns}
+        return columns, dictionaries
+
+class NDJSONRenderer(ErrorEnvelopeMixin, renderers.BaseRenderer):
+    """_summary_
+    This renderer writes one JSON document per line, used for task exports.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
     def render(self, data, accepted_media_type=None, renderer_context=None):
-        response = ''
-        if 'ErrorDetail' in str(data):
-            response = json.dumps({ 'errors' : data })
-        else:
-            response = json.dumps(data)
-        return response
+        # Only errors are rendered through here, exports go through stream()
+        return json.dumps(self.envelope(data, renderer_context), cls=encoders.JSONEncoder) + '\n'
+
+    def stream(self, fields, rows):
+        """
+        Lazily encodes an iterable of value tuples, one line per row.
+        """
+        for row in rows:
+            yield json.dumps(dict(zip(fields, row)), cls=encoders.JSONEncoder) + '\n'
+
+class CSVRenderer(ErrorEnvelopeMixin, renderers.BaseRenderer):
+    """_summary_
+    This renderer writes a header line followed by one CSV line per row, used for task exports.
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # Only errors are rendered through here, exports go through stream()
+        return json.dumps(self.envelope(data, renderer_context), cls=encoders.JSONEncoder)
+
+    def stream(self, fields, rows):
+        """
+        Lazily encodes an iterable of value tuples, one line per row. Values
+        other than strings and numbers are formatted by the DRF encoder, so
+        datetimes come out in ISO 8601 as in the JSON responses.
+        """
+        default = encoders.JSONEncoder().default
+        formatted = (
+            [value if value is None or isinstance(value, (str, int, float)) else default(value) for value in row]
+            for row in rows
+        )
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in itertools.chain([fields], formatted):
+            writer.writerow(row)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
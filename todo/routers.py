@@ -0,0 +1,98 @@
+import contextvars
+import random
+import sqlite3
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.db import connections
+
+from todo import cache
+
+REPLICATED_MODELS = {'todo.task', 'todo.taskstats', 'todo.tasktombstone', 'authentication.user'}
+
+_replica_reads = contextvars.ContextVar('replica_reads', default=False)
+
+def primary_pin_key(user_id):
+    return 'db:primary:%s' % user_id
+
+def pin_to_primary(user_id):
+    """
+    Sends the reads of a user to the primary for REPLICA_STICKY_SECONDS after
+    a write, so the user reads their own writes while the replicas catch up.
+    The pin lives in the tasks cache, which must be shared by the workers, see todo.checks.
+    """
+    if settings.DATABASE_REPLICAS:
+        cache.get_cache().set(primary_pin_key(user_id), True, timeout = settings.REPLICA_STICKY_SECONDS)
+
+def is_pinned_to_primary(user_id):
+    return cache.get_cache().get(primary_pin_key(user_id)) is not None
+
+def choose_replica():
+    return random.choice(settings.DATABASE_REPLICAS)
+
+def read_database(user_id):
+    """
+    Alias the reads of a user should go to right now.
+    """
+    if not settings.DATABASE_REPLICAS or is_pinned_to_primary(user_id):
+        return 'default'
+    return choose_replica()
+
+@contextmanager
+def replica_reads(user_id):
+    """
+    Lets the router send the Task and User reads of the block to a replica,
+    unless the user wrote recently.
+    """
+    token = _replica_reads.set(read_database(user_id))
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+def read_from_replica(handler):
+    """
+    Decorator for the GET handlers of the task views, see replica_reads().
+    """
+    @wraps(handler)
+    def wrapper(self, request, *args, **kwargs):
+        with replica_reads(request.user.id):
+            return handler(self, request, *args, **kwargs)
+    return wrapper
+
+class ReadReplicaRouter:
+    """
+    Sends every write to the primary and the reads made inside replica_reads()
+    to a read replica. Replicas are copies of the primary made with
+    sync_replica() and are never migrated themselves.
+    """
+    def db_for_read(self, model, **hints):
+        alias = _replica_reads.get()
+        if alias and model._meta.label_lower in REPLICATED_MODELS:
+            return alias
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+def sync_replica(alias, source_alias='default'):
+    """
+    Copies the primary SQLite file into a replica with the online backup API.
+    The copy is a consistent snapshot, writers on the primary are not blocked.
+    """
+    source = sqlite3.connect(connections[source_alias].settings_dict['NAME'], uri = True)
+    target = sqlite3.connect(connections[alias].settings_dict['NAME'], uri = True)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
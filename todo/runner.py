@@ -0,0 +1,27 @@
+import tempfile
+
+from django.conf import settings
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+class TestRunner(DiscoverRunner):
+    """
+    Test runner turning throttling off, so the many requests of the suite
+    from one client are not rejected. Throttling tests turn it back on
+    with override_settings. The tasks cache gets a directory of its own,
+    so nothing is shared with a running server or an earlier run.
+    """
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        settings.THROTTLING = {**settings.THROTTLING, 'ENABLED': False}
+        self.task_cache_dir = tempfile.TemporaryDirectory()
+        self.task_cache_settings = override_settings(CACHES = {
+            **settings.CACHES,
+            'tasks': {**settings.CACHES['tasks'], 'LOCATION': self.task_cache_dir.name},
+        })
+        self.task_cache_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.task_cache_settings.disable()
+        self.task_cache_dir.cleanup()
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,91 @@
+import hashlib
+import os
+import threading
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+from drf_yasg import openapi
+from drf_yasg.codecs import OpenAPICodecJson, OpenAPICodecYaml
+from drf_yasg.generators import OpenAPISchemaGenerator
+from drf_yasg.views import get_schema_view
+from rest_framework import permissions
+
+info = openapi.Info(
+   title="TODO API Docs",
+   default_version='v1',
+   description="Docs for rest api's in the project",
+   terms_of_service="https://www.example.com/terms/",
+   contact=openapi.Contact(email="prateekj1171998@gmail.com"),
+   license=openapi.License(name="Awesome License"),
+)
+
+CODECS = {
+    'json': lambda: OpenAPICodecJson(validators=[], pretty=True),
+    'yaml': lambda: OpenAPICodecYaml(validators=[]),
+}
+
+def artifact_path(format):
+    return os.path.join(settings.OPENAPI_SCHEMA_DIR, 'schema.%s' % format)
+
+def generate():
+    """
+    Walks every view and renders the spec in each format, as bytes.
+    The spec is request independent, the UI fills in the host it is served from.
+    """
+    schema = OpenAPISchemaGenerator(info).get_schema(request=None, public=True)
+    return {format: codec().encode(schema) for format, codec in CODECS.items()}
+
+def write_artifacts():
+    os.makedirs(settings.OPENAPI_SCHEMA_DIR, exist_ok=True)
+    paths = []
+    for format, content in generate().items():
+        with open(artifact_path(format), 'wb') as artifact:
+            artifact.write(content)
+        paths.append(artifact_path(format))
+    return paths
+
+_documents = {}
+_documents_lock = threading.Lock()
+
+def get_document(format):
+    """
+    The spec in a format and its ETag, read from the artifacts written by
+    generate_openapi_schema. Without artifacts it is generated once per process.
+    """
+    document = _documents.get(format)
+    if document is None:
+        with _documents_lock:
+            if not _documents:
+                try:
+                    contents = {}
+                    for name in CODECS:
+                        with open(artifact_path(name), 'rb') as artifact:
+                            contents[name] = artifact.read()
+                except FileNotFoundError:
+                    contents = generate()
+                for name, content in contents.items():
+                    _documents[name] = (content, quote_etag(hashlib.sha256(content).hexdigest()[:32]))
+            document = _documents[format]
+    return document
+
+def clear_documents():
+    with _documents_lock:
+        _documents.clear()
+
+class SchemaView(get_schema_view(info, public=True, permission_classes=(permissions.AllowAny,))):
+    """
+    Serves the precomputed spec with a strong ETag and long lived cache headers,
+    the UI page itself is built by drf_yasg without walking any view.
+    """
+    def get(self, request, version='', format=None):
+        if request.accepted_renderer.format not in ('openapi', '.json', '.yaml'):
+            return super().get(request, version, format)
+        content, etag = get_document('yaml' if request.accepted_renderer.format == '.yaml' else 'json')
+        response = get_conditional_response(request, etag = etag)
+        if response is None:
+            response = HttpResponse(content, content_type = request.accepted_renderer.media_type)
+        response['ETag'] = etag
+        patch_cache_control(response, public = True, max_age = settings.OPENAPI_SCHEMA_MAX_AGE)
+        return response
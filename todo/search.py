@@ -0,0 +1,56 @@
+import re
+
+from django.db import connections
+
+from todo.models import Task
+
+FTS_TABLE = 'todo_task_fts'
+# bm25 weights of the title and description columns, a title hit ranks higher.
+# The owner column only scopes a search to a user and does not count.
+TITLE_WEIGHT = 5.0
+DESCRIPTION_WEIGHT = 1.0
+
+TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+def match_query(user_id, text):
+    """
+    Turns free text into an FTS5 query matching every word, the last one as a
+    prefix so partially typed words match. Words are quoted, so FTS5 operators
+    and punctuation in the text are searched for rather than interpreted.
+    They are only looked up in the title and description of the user's tasks,
+    the owner token makes FTS5 skip the entries of every other account.
+    Returns None when the text has no word.
+    """
+    terms = TERM_RE.findall(text)
+    if not terms:
+        return None
+    quoted = ['"%s"' % term for term in terms]
+    quoted[-1] += '*'
+    return 'owner:"u%d" AND {title description}: (%s)' % (user_id, ' '.join(quoted))
+
+def search_tasks(user_id, text, limit, fields=None):
+    """
+    Tasks of a user matching the text, best bm25 rank first.
+    """
+    query = match_query(user_id, text)
+    if query is None:
+        return []
+    if fields is None:
+        columns = 't.*'
+    else:
+        # Like .only(), the columns outside the fieldset are not read
+        columns = ', '.join('t.%s' % Task._meta.get_field(field).column for field in dict.fromkeys(['id', *fields]))
+    sql = (
+        'SELECT %s FROM {fts} f JOIN todo_task t ON t.id = f.rowid '
+        'WHERE {fts} MATCH %%s AND t.user_id = %%s '
+        'ORDER BY bm25({fts}, %%s, %%s, 0), t.id LIMIT %%s'
+    ).format(fts = FTS_TABLE) % columns
+    return list(Task.objects.raw(sql, [query, user_id, TITLE_WEIGHT, DESCRIPTION_WEIGHT, limit]))
+
+def rebuild_index(using='default'):
+    """
+    Rebuilds the search index from the task table and merges its segments.
+    """
+    with connections[using].cursor() as cursor:
+        cursor.execute("INSERT INTO %s(%s) VALUES ('rebuild')" % (FTS_TABLE, FTS_TABLE))
+        cursor.execute("INSERT INTO %s(%s) VALUES ('optimize')" % (FTS_TABLE, FTS_TABLE))
@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
+import os
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -44,6 +46,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'todo.middleware.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -53,7 +56,8 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
-ROOT_URLCONF = 'todo.urls'
+# todo/asgi.py switches to todo.asgi_urls, serving the native async task views
+ROOT_URLCONF = os.environ.get('DJANGO_ROOT_URLCONF', 'todo.urls')
 
 TEMPLATES = [
     {
@@ -77,14 +81,110 @@ WSGI_APPLICATION = 'todo.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
-DATABASES = {
+# DB_PROFILE=production tunes SQLite for several concurrent worker processes:
+# WAL lets readers run alongside the writer, writers wait on busy_timeout
+# instead of failing, and connections are kept open between requests.
+DB_PROFILE = os.environ.get('DB_PROFILE', 'default')
+
+DATABASE_PROFILES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+    },
+    'production': {
+        'ENGINE': 'todo.sqlite',
+        'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        # Run on every new connection by todo.pragmas.apply_pragmas, in order
+        'PRAGMAS': {
+            'busy_timeout': 5000,
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'mmap_size': 256 * 1024 * 1024,
+            'cache_size': -64000,
+            'temp_store': 'MEMORY',
+        },
+    },
+}
+
+DATABASES = {
+    'default': DATABASE_PROFILES[DB_PROFILE],
+}
+
+# Read replicas used by the GET handlers of the task views, see todo/routers.py.
+# DB_REPLICA_PATH adds a replica SQLite file, refreshed from the primary with
+# `python manage.py sync_replica`. A user who just wrote reads from the primary
+# for REPLICA_STICKY_SECONDS, keep it above the replica refresh interval.
+DB_REPLICA_PATH = os.environ.get('DB_REPLICA_PATH')
+if DB_REPLICA_PATH:
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': DB_REPLICA_PATH,
+        'TEST': {'MIRROR': 'default'},
     }
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['todo.routers.ReadReplicaRouter']
+REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 5))
+
+
+# Delta sync, see todo/sync.py. Clients whose token is older than the retention
+# of the deletion log get a 410 and fetch the full list again.
+TASK_TOMBSTONE_RETENTION_DAYS = 30
+TASK_CHANGES_SETTLE_SECONDS = 1
+
+
+# Idempotency-Key on task create and update, see todo/idempotency.py. A retry
+# waits up to IDEMPOTENCY_WAIT_SECONDS for the first request to finish, a claim
+# not finished after IDEMPOTENCY_LOCK_SECONDS is taken to be from a dead worker.
+IDEMPOTENCY_KEY_TTL_SECONDS = 24 * 60 * 60
+IDEMPOTENCY_WAIT_SECONDS = 10
+IDEMPOTENCY_LOCK_SECONDS = 60
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+
+# The tasks cache holds rendered task pages per user, see todo/cache.py. A write
+# invalidates it for every worker process, so it is a SQLite file in a directory
+# shared by the workers. TASK_CACHE_BACKEND=locmem keeps it in process memory,
+# only for a single process such as runserver, the ETag validators are then
+# not cached at all.
+TASK_CACHE_DIR = os.environ.get('TASK_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'todo-task-cache'))
+TASK_CACHE_BACKEND = os.environ.get('TASK_CACHE_BACKEND', 'sqlite')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'tasks': {
+        'BACKEND': (
+            'django.core.cache.backends.locmem.LocMemCache' if TASK_CACHE_BACKEND == 'locmem'
+            else 'todo.cache.SQLiteCache'
+        ),
+        'LOCATION': 'tasks' if TASK_CACHE_BACKEND == 'locmem' else TASK_CACHE_DIR,
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
 }
 
 
+# Metrics
+# Every worker process writes its counters to an mmap-backed file in
+# METRICS_DIR and /metrics sums all of them, see todo/metrics.py. Point it at a
+# directory shared by the workers and empty it when the server starts.
+
+METRICS_DIR = os.environ.get('METRICS_DIR', os.path.join(tempfile.gettempdir(), 'todo-metrics'))
+
+# /metrics answers scrapes from these addresses, or with an
+# `Authorization: Bearer <METRICS_TOKEN>` header when a token is set.
+METRICS_ALLOWED_IPS = [ip for ip in os.environ.get('METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',') if ip]
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -104,6 +204,29 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+PASSWORD_HASHERS = [
+    'authentication.hashers.ProfilePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+AUTHENTICATION_BACKENDS = [
+    'authentication.backends.HashingPoolModelBackend',
+]
+
+# Password hashing runs on a bounded pool of threads, see authentication/hashing.py.
+# Changing ITERATIONS rehashes passwords on the next successful login.
+PASSWORD_HASHING = {
+    'ITERATIONS': int(os.environ.get('PASSWORD_HASH_ITERATIONS', 720000)),
+    'MAX_WORKERS': int(os.environ.get('PASSWORD_HASH_WORKERS', 2)),
+    'MAX_PENDING': 8,
+    'QUEUE_TIMEOUT': 5,
+}
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.0/topics/i18n/
 
@@ -121,8 +244,6 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
-import os
-
 PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
 STATIC_ROOT = os.path.join(PROJECT_DIR, 'static')
 
@@ -162,6 +283,17 @@ SIMPLE_JWT = {
     "SLIDING_TOKEN_REFRESH_SERIALIZER": "rest_framework_simplejwt.serializers.TokenRefreshSlidingSerializer",
 }
 
+# In-process caches of authentication.authentication.CachedJWTAuthentication
+JWT_AUTH_CACHE = {
+    'MAX_TOKENS': 10000,
+    'MAX_USERS': 10000,
+    'USER_CHECK_TTL': 60,
+}
+
+# The spec served by /swagger/, written by generate_openapi_schema, see todo/schema.py
+OPENAPI_SCHEMA_DIR = os.path.join(PROJECT_DIR, 'openapi')
+OPENAPI_SCHEMA_MAX_AGE = 24 * 60 * 60
+
 SWAGGER_SETTINGS = {
     'SECURITY_DEFINITIONS': {
         'Basic': {
@@ -174,11 +306,38 @@ CSRF_TRUSTED_ORIGINS = ["http://localhost:8000"]
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'authentication.authentication.CachedJWTAuthentication',
     ),
+    'DEFAULT_THROTTLE_CLASSES': [
+        'todo.throttling.ClientIPThrottle',
+        'todo.throttling.UserThrottle',
+    ],
+    # Client IPs are taken from X-Forwarded-For only behind this many trusted proxies,
+    # with 0 the header is ignored so clients cannot pick their own throttling bucket
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 0)),
     'DEFAULT_PARSER_CLASSES': [
         'rest_framework.parsers.FormParser',
         'rest_framework.parsers.MultiPartParser',
         'rest_framework.parsers.JSONParser',
     ]
 }
+
+# Token bucket throttling, see todo/throttling.py. The sqlite store keeps the
+# buckets in a file shared by the worker processes on one host, set STORE to
+# 'cache' to keep them in the CACHE alias instead.
+THROTTLING = {
+    'ENABLED': True,
+    'STORE': os.environ.get('THROTTLE_STORE', 'sqlite'),
+    'PATH': os.environ.get('THROTTLE_DB_PATH', os.path.join(tempfile.gettempdir(), 'todo-throttle.sqlite3')),
+    'CACHE': 'default',
+    'RATES': {
+        'login_ip': '10/min',
+        'login_account': '5/min',
+        'register_ip': '20/hour',
+        'tasks_ip': '600/min',
+        'tasks_user': '300/min',
+    },
+}
+
+# Runs the tests with throttling off, see todo/runner.py
+TEST_RUNNER = 'todo.runner.TestRunner'
@@ -0,0 +1,20 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from authentication.models import User
+from todo import cache, routers
+from todo.models import Task
+
+# No post_delete receiver on Task: it would turn every QuerySet.delete() into a
+# SELECT and one signal per row. The delete views invalidate explicitly and the
+# deletion log is written by triggers, see the 0012 migration.
+@receiver(post_save, sender=Task)
+def invalidate_task_cache(sender, instance, **kwargs):
+    cache.invalidate(instance.user_id)
+    routers.pin_to_primary(instance.user_id)
+
+@receiver(post_save, sender=User)
+def invalidate_new_user_cache(sender, instance, created, **kwargs):
+    # Nothing may be served to a new user from entries of a deleted user with the same id
+    if created:
+        cache.invalidate(instance.pk)
@@ -0,0 +1,3 @@
+"""
+SQLite database engine for the production profile (ENGINE 'todo.sqlite').
+"""
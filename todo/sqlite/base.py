@@ -0,0 +1,13 @@
+from django.db.backends.sqlite3 import base
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    SQLite backend starting atomic blocks with BEGIN IMMEDIATE.
+
+    A deferred BEGIN only takes the write lock at the first write, and a
+    transaction that read first then fails with "database is locked" right
+    away instead of waiting for busy_timeout. Taking the lock up front makes
+    concurrent writers queue on busy_timeout instead.
+    """
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute('BEGIN IMMEDIATE')
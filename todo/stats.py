@@ -0,0 +1,43 @@
+from django.db import transaction
+from django.db.models import Count
+
+from todo.models import Task, TaskStats
+
+# Counter column of each task status
+STATUS_COLUMNS = {
+    Task.TaskStatus.PENDING: 'pending',
+    Task.TaskStatus.IN_PROGRESS: 'in_progress',
+    Task.TaskStatus.COMPLETED: 'completed',
+}
+
+def get_stats(user_id):
+    """
+    Task counts of a user per status, a primary key lookup of their counter row.
+    """
+    row = TaskStats.objects.filter(user_id = user_id).values(*STATUS_COLUMNS.values()).first()
+    counts = row or dict.fromkeys(STATUS_COLUMNS.values(), 0)
+    return {**counts, 'total': sum(counts.values())}
+
+def count_tasks():
+    """
+    Recounts the tasks of every user with a GROUP BY over the task table.
+    """
+    counts = {}
+    for row in Task.objects.order_by().values('user_id', 'status').annotate(count = Count('id')):
+        counts.setdefault(row['user_id'], dict.fromkeys(STATUS_COLUMNS.values(), 0))[STATUS_COLUMNS[row['status']]] = row['count']
+    return counts
+
+def reconcile():
+    """
+    Rewrites the counter rows that drifted from a recount, returns their user ids.
+    """
+    with transaction.atomic():
+        counts = count_tasks()
+        repaired = []
+        for stats in TaskStats.objects.all():
+            expected = counts.pop(stats.user_id, dict.fromkeys(STATUS_COLUMNS.values(), 0))
+            if any(getattr(stats, column) != value for column, value in expected.items()):
+                TaskStats.objects.filter(user_id = stats.user_id).update(**expected)
+                repaired.append(stats.user_id)
+        TaskStats.objects.bulk_create([TaskStats(user_id = user_id, **expected) for user_id, expected in counts.items()])
+        return repaired + list(counts)
@@ -0,0 +1,106 @@
+import base64
+import json
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+from rest_framework import exceptions, status
+
+from todo.models import Task, TaskTombstone
+
+class SyncTokenExpired(exceptions.APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = 'Sync token is older than the deletion log, fetch the full task list again.'
+    default_code = 'sync_token_expired'
+
+def seek_filter(field, position):
+    """
+    `(field, id) > (x, y)`, with a leading `field >= x` for the index range scan.
+    """
+    return Q(**{f'{field}__gte': position[0]}) & (
+        Q(**{f'{field}__gt': position[0]}) | Q(**{field: position[0], 'id__gt': position[1]})
+    )
+
+def encode_position(position):
+    return None if position is None else [position[0].isoformat(), position[1]]
+
+def decode_position(value):
+    if value is None:
+        return None
+    position = (datetime.fromisoformat(value[0]), int(value[1]))
+    # Tokens are only ever issued with aware datetimes
+    if timezone.is_naive(position[0]):
+        raise ValueError
+    return position
+
+def encode_token(task_position, tombstone_position):
+    payload = json.dumps({'t': encode_position(task_position), 'd': encode_position(tombstone_position)}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+def decode_token(token):
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+        tombstone_position = decode_position(payload['d'])
+        if tombstone_position is None:
+            raise ValueError
+        return decode_position(payload['t']), tombstone_position
+    except (AttributeError, TypeError, ValueError, KeyError, IndexError, UnicodeEncodeError):
+        raise exceptions.ValidationError({'since': ['Invalid sync token']})
+
+def get_changes(user_id, token, limit, tasks=None):
+    """
+    Tasks created or updated and ids of tasks deleted after the positions of a
+    sync token, each in (time, id) order, and the token to pass next time.
+    Without a token every task is returned and the deletion log is skipped.
+
+    Rows written in the last TASK_CHANGES_SETTLE_SECONDS are left for the next
+    call: a writer stamps `updated` before it commits, so a row younger than
+    that could still be followed by one with an older stamp.
+    """
+    now = timezone.now()
+    horizon = now - timedelta(seconds = settings.TASK_CHANGES_SETTLE_SECONDS)
+    tombstones = TaskTombstone.objects.filter(user_id = user_id, deleted__lte = horizon)
+
+    if token:
+        task_position, tombstone_position = decode_token(token)
+        if tombstone_position[0] < now - timedelta(days = settings.TASK_TOMBSTONE_RETENTION_DAYS):
+            raise SyncTokenExpired()
+    else:
+        task_position = None
+        latest = tombstones.order_by('-deleted', '-id').values_list('deleted', 'id').first()
+        tombstone_position = latest or (horizon, 0)
+
+    tasks = (Task.objects if tasks is None else tasks).filter(user_id = user_id, updated__lte = horizon)
+    if task_position is not None:
+        tasks = tasks.filter(seek_filter('updated', task_position))
+    tasks = list(tasks.order_by('updated', 'id')[:limit + 1])
+
+    deleted = []
+    if token:
+        # A live task of the user with the same id was created after the deletion
+        recreated = Task.objects.filter(id = OuterRef('task_id'), user_id = user_id)
+        deleted = list(
+            tombstones.filter(seek_filter('deleted', tombstone_position)).exclude(Exists(recreated))
+            .order_by('deleted', 'id').values_list('deleted', 'id', 'task_id')[:limit + 1]
+        )
+
+    has_more = len(tasks) > limit or len(deleted) > limit
+    tasks, deleted = tasks[:limit], deleted[:limit]
+    if tasks:
+        task_position = (tasks[-1].updated, tasks[-1].id)
+    if deleted:
+        tombstone_position = deleted[-1][:2]
+    if token and len(deleted) < limit:
+        # Every deletion up to the horizon was returned, so the position moves up
+        # to it even without one and a token in use does not age out of the log
+        tombstone_position = max(tombstone_position, (horizon, 0))
+    return tasks, [task_id for _, _, task_id in deleted], encode_token(task_position, tombstone_position), has_more
+
+def purge_tombstones():
+    """
+    Drops the deletion log entries older than the retention period.
+    """
+    cutoff = timezone.now() - timedelta(days = settings.TASK_TOMBSTONE_RETENTION_DAYS)
+    deleted, _ = TaskTombstone.objects.filter(deleted__lt = cutoff).delete()
+    return deleted
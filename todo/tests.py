@@ -1,7 +1,32 @@
+import csv
+import importlib
+import json
+import sqlite3
+import tempfile
+import threading
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.apps import apps
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.test import SimpleTestCase, override_settings
 from rest_framework import status, exceptions
+from rest_framework.response import Response
 from rest_framework.test import APITestCase
 from authentication.models import User
-from todo.models import Task
+from todo import cache, metrics, routers, schema, search, stats, sync
+from todo.checks import check_replica_pin_cache
+from todo.management.commands.bench import Command as BenchCommand
+from todo.models import IdempotencyRecord, Task, TaskStats, TaskTombstone
+from todo.routers import ReadReplicaRouter
+from todo.throttling import CacheBucketStore, SQLiteBucketStore
+from todo.renderers import ColumnarTaskRenderer, TaskRenderer
 
 register_url = '/users/register'
 task_creation_url = '/tasks'
@@ -176,6 +201,28 @@ class TaskCreationTests(APITestCase):
 
         self.assertEqual(Task.objects.count(), 2)
 
+    def test_unique_open_title_migration_renames_duplicates(self):
+        """
+        Ensure the migration adding the unique open title constraint renames existing duplicates.
+        """
+        migration = importlib.import_module('todo.migrations.0005_task_unique_open_title')
+        self.create_user_1()
+        user = User.objects.get()
+        # Duplicates from before the constraint, the index comes back when the test transaction rolls back
+        with connection.cursor() as cursor:
+            cursor.execute('DROP INDEX task_unique_open_title')
+        Task.objects.bulk_create([
+            Task(title = title, description = 'Description', status = task_status, user = user)
+            for title, task_status in [
+                ('Clean Room', 'PENDING'), ('Clean Room', 'IN_PROGRESS'), ('Clean Room (2)', 'PENDING'),
+                ('Clean Room', 'COMPLETED'), ('Clean Room', 'PENDING'), ('x' * 200, 'PENDING'), ('x' * 200, 'PENDING'),
+            ]
+        ])
+        migration.rename_duplicate_open_titles(apps, None)
+        self.assertEqual(list(Task.objects.order_by('id').values_list('title', flat = True)), [
+            'Clean Room', 'Clean Room (3)', 'Clean Room (2)', 'Clean Room', 'Clean Room (4)', 'x' * 200, 'x' * 196 + ' (2)',
+        ])
+
 class TaskGetTests(APITestCase):
     """
     Contains tests for getting tasks
@@ -250,8 +297,175 @@ class TaskGetTests(APITestCase):
                     'user': 1,
                 },
             ],
+            'next': None,
+            'prev': None,
         })
 
+    def test_task_list_pagination(self):
+        """
+        Ensure we can walk the task list forwards and backwards with cursors.
+        """
+        access_token_1 = self.create_user_1()
+        headers1 = {
+           'Authorization': 'Bearer ' + access_token_1['token']['access']
+        }
+        for i in range(5):
+            task_data = {
+                'title': 'Task %d' % i,
+                'description': 'Description %d' % i,
+            }
+            self.client.post(task_creation_url, task_data, format='json', headers = headers1)
+        self.assertEqual(Task.objects.count(), 5)
+
+        response = self.client.get(task_creation_url, {'page_size': 2}, headers = headers1)
+        assert response.status_code == 200
+        self.assertEqual([task['id'] for task in response.data['data']], [1, 2])
+        self.assertIsNone(response.data['prev'])
+
+        response = self.client.get(task_creation_url, {'page_size': 2, 'cursor': response.data['next']}, headers = headers1)
+        self.assertEqual([task['id'] for task in response.data['data']], [3, 4])
+
+        last_page = self.client.get(task_creation_url, {'page_size': 2, 'cursor': response.data['next']}, headers = headers1)
+        self.assertEqual([task['id'] for task in last_page.data['data']], [5])
+        self.assertIsNone(last_page.data['next'])
+
+        response = self.client.get(task_creation_url, {'page_size': 2, 'cursor': last_page.data['prev']}, headers = headers1)
+        self.assertEqual([task['id'] for task in response.data['data']], [3, 4])
+
+        response = self.client.get(task_creation_url, {'cursor': 'not-a-cursor'}, headers = headers1)
+        assert response.status_code == 400
+
+    def test_task_sparse_fieldsets(self):
+        """
+        Ensure ?fields= shrinks the list and detail payloads and the selected columns.
+        """
+        access_token_1 = self.create_user_1()
+        headers1 = {
+           'Authorization': 'Bearer ' + access_token_1['token']['access']
+        }
+        for i in range(3):
+            task_data = {
+                'title': 'Task %d' % i,
+                'description': 'Description %d' % i,
+            }
+            self.client.post(task_creation_url, task_data, format='json', headers = headers1)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(task_creation_url, {'fields': 'id,title,status', 'page_size': 2}, headers = headers1)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['data'], [
+            {'id': 1, 'title': 'Task 0', 'status': 'PENDING'},
+            {'id': 2, 'title': 'Task 1', 'status': 'PENDING'},
+        ])
+        task_queries = [query['sql'] for query in queries if 'FROM "todo_task"' in query['sql'] and 'LIMIT' in query['sql']]
+        self.assertEqual(len(task_queries), 1)
+        self.assertNotIn('"description"', task_queries[0])
+
+        response = self.client.get(task_creation_url, {'fields': 'title', 'cursor': response.data['next']}, headers = headers1)
+        self.assertEqual(response.data['data'], [{'title': 'Task 2'}])
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(task_creation_url + '/1', {'fields': 'status,title'}, headers = headers1)
+        self.assertEqual(response.data['data'], {'title': 'Task 0', 'status': 'PENDING'})
+        self.assertFalse(any('"description"' in query['sql'] for query in queries))
+
+        response = self.client.get(task_creation_url, {'fields': 'title,secret'}, headers = headers1)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_task_list_filters_and_ordering(self):
+        """
+        Ensure task lists can be filtered and ordered, and paginate in that order.
+        """
+        access_token_1 = self.create_user_1()
+        headers1 = {
+           'Authorization': 'Bearer ' + access_token_1['token']['access']
+        }
+        for title, task_status in [('Buy milk', 'PENDING'), ('Call mom', 'COMPLETED'), ('buy bread', 'IN_PROGRESS'), ('Buy eggs', 'COMPLETED')]:
+            task_data = {
+                'title': title,
+                'description': 'Description',
+                'status': task_status,
+            }
+            self.client.post(task_creation_url, task_data, format='json', headers = headers1)
+        Task.objects.filter(title = 'Buy milk').update(updated = timezone.now() + timedelta(hours = 1))
+
+        def titles(params):
+            response = self.client.get(task_creation_url, params, headers = headers1)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return [task['title'] for task in response.data['data']]
+
+        self.assertEqual(titles({'status': ['COMPLETED', 'IN_PROGRESS']}), ['Call mom', 'buy bread', 'Buy eggs'])
+        self.assertEqual(titles({'title_prefix': 'Buy'}), ['Buy milk', 'Buy eggs'])
+        self.assertEqual(titles({'ordering': 'title'}), ['Buy eggs', 'Buy milk', 'Call mom', 'buy bread'])
+        self.assertEqual(titles({'ordering': '-updated', 'page_size': 2}), ['Buy milk', 'Buy eggs'])
+        self.assertEqual(titles({'updated_after': (timezone.now() + timedelta(minutes = 30)).isoformat()}), ['Buy milk'])
+        self.assertEqual(titles({'created_before': '2000-01-01T00:00:00Z'}), [])
+        # The maximum code point has no successor to bound the prefix range with
+        Task.objects.filter(title = 'Call mom').update(title = 'Call \U0010ffff\U0010ffffmom')
+        self.assertEqual(titles({'title_prefix': 'Call \U0010ffff'}), ['Call \U0010ffff\U0010ffffmom'])
+        self.assertEqual(titles({'title_prefix': '\U0010ffff'}), [])
+        # The code point after U+D7FF is a surrogate, the bound skips to U+E000
+        Task.objects.filter(title = 'Buy eggs').update(title = 'Buy \ud7ffeggs')
+        self.assertEqual(titles({'title_prefix': 'Buy \ud7ff'}), ['Buy \ud7ffeggs'])
+        Task.objects.filter(title__startswith = 'Buy \ud7ff').update(title = 'Buy eggs')
+        # Whitespace is part of the prefix
+        Task.objects.filter(title = 'Buy milk').update(title = 'Buyer milk')
+        self.assertEqual(titles({'title_prefix': 'Buy '}), ['Buy eggs'])
+        Task.objects.filter(title = 'Buyer milk').update(title = 'Buy milk')
+        Task.objects.filter(title__startswith = 'Call ').update(title = 'Call mom')
+
+        response = self.client.get(task_creation_url, {'ordering': '-title', 'page_size': 3}, headers = headers1)
+        self.assertEqual([task['title'] for task in response.data['data']], ['buy bread', 'Call mom', 'Buy milk'])
+        response = self.client.get(task_creation_url, {'ordering': '-title', 'page_size': 3, 'cursor': response.data['next']}, headers = headers1)
+        self.assertEqual([task['title'] for task in response.data['data']], ['Buy eggs'])
+        previous = self.client.get(task_creation_url, {'ordering': '-title', 'page_size': 3, 'cursor': response.data['prev']}, headers = headers1)
+        self.assertEqual([task['title'] for task in previous.data['data']], ['buy bread', 'Call mom', 'Buy milk'])
+        # A cursor cannot be replayed on another ordering
+        response = self.client.get(task_creation_url, {'ordering': 'created', 'cursor': response.data['prev']}, headers = headers1)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        for params in [{'status': 'DONE'}, {'ordering': 'description'}, {'created_after': 'yesterday'}]:
+            response = self.client.get(task_creation_url, params, headers = headers1)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_task_list_query_plans(self):
+        """
+        Ensure every filter and ordering of task lists searches a user_id index instead of scanning.
+        """
+        access_token_1 = self.create_user_1()
+        headers1 = {
+           'Authorization': 'Bearer ' + access_token_1['token']['access']
+        }
+        for i in range(2):
+            self.client.post(task_creation_url, {'title': 'Task %d' % i, 'description': 'Description'}, format='json', headers = headers1)
+        cursor = self.client.get(task_creation_url, {'page_size': 1}, headers = headers1).data['next']
+        filters = [
+            {},
+            {'status': ['PENDING', 'COMPLETED']},
+            {'created_after': '2000-01-01T00:00:00Z', 'created_before': '2100-01-01T00:00:00Z'},
+            {'updated_after': '2000-01-01T00:00:00Z'},
+            {'title_prefix': 'Ta'},
+        ]
+        for params in filters:
+            for ordering in ['created', '-updated', 'title']:
+                with self.subTest(params = params, ordering = ordering):
+                    with CaptureQueriesContext(connection) as queries:
+                        response = self.client.get(task_creation_url, {**params, 'ordering': ordering}, headers = headers1)
+                    self.assertEqual(response.status_code, status.HTTP_200_OK)
+                    sql = [query['sql'] for query in queries if 'FROM "todo_task"' in query['sql'] and 'LIMIT' in query['sql']][-1]
+                    with connection.cursor() as db_cursor:
+                        db_cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+                        plan = [row[-1] for row in db_cursor.fetchall()]
+                    self.assertNotIn('SCAN todo_task', plan)
+                    self.assertRegex(plan[0], r'^SEARCH todo_task USING (COVERING )?INDEX task_user_')
+        # The default seek of a following page stays on the pagination index
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(task_creation_url, {'cursor': cursor}, headers = headers1)
+        sql = [query['sql'] for query in queries if 'FROM "todo_task"' in query['sql'] and 'LIMIT' in query['sql']][-1]
+        with connection.cursor() as db_cursor:
+            db_cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            self.assertIn('task_user_created_id_idx', db_cursor.fetchall()[0][-1])
+
 class TaskDetailTests(APITestCase):
     """
     Contains tests for getting task details
@@ -437,3 +651,1401 @@ class TaskDetailTests(APITestCase):
         self.assertEqual(response.data, {
             'data' : 'Task updated successfully',
         })
+
+    def test_update_task_duplicate_title(self):
+        """
+        Ensure we cannot rename a task to the title of another non-complete task.
+        """
+        access_token_1 = self.create_user_1()
+        headers1 = {
+           'Authorization': 'Bearer ' + access_token_1['token']['access']
+        }
+        for title in ['Clean Room', 'Buy Milk']:
+            task_data = {
+                'title': title,
+                'description': 'Need to clean my room and change bed sheets',
+            }
+            self.client.post(task_creation_url, task_data, format='json', headers = headers1)
+        self.assertEqual(Task.objects.count(), 2)
+        task_data_update = {
+            'title': 'Clean Room',
+            'description': 'Need to clean my room and change bed sheets',
+            'status': Task.TaskStatus.PENDING
+        }
+        response = self.client.put('/tasks/2', task_data_update, format='json', headers = headers1)
+        assert response.status_code == 400
+        self.assertEqual(response.data, {
+            'errors': {
+                'non_field_errors': [
+                    'There is already a non complete task'
+                ]
+            }
+        })
+        task_data_update['status'] = Task.TaskStatus.COMPLETED
+        response = self.client.put('/tasks/2', task_data_update, format='json', headers = headers1)
+        assert response.status_code == 200
+
+class TaskExportTests(APITestCase):
+    """
+    Contains tests for exporting tasks
+    """
+    def create_user_1(self):
+        """
+        Common function for creating user
+        """
+        register_user = {
+            'name': 'Test',
+            'email': 'test@gmail.com',
+            'password': 'password',
+            'password_check': 'password',
+        }
+        response = self.client.post(register_url, register_user, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data
+
+    def create_tasks(self, headers):
+        """
+        Common function for creating tasks
+        """
+        for title in ['Clean Room', 'Buy, Milk']:
+            task_data = {
+                'title': title,
+                'description': 'Need to %s' % title.lower(),
+            }
+            self.client.post(task_creation_url, task_data, format='json', headers = headers)
+        self.assertEqual(Task.objects.count(), 2)
+
+    def test_export_ndjson(self):
+        """
+        Ensure we can stream tasks as NDJSON.
+        """
+        access_token_1 = self.create_user_1()
+        headers1 = {
+           'Authorization': 'Bearer ' + access_token_1['token']['access']
+        }
+        self.create_tasks(headers1)
+        response = self.client.get('/tasks/export', {'format': 'ndjson'}, headers = headers1)
+        assert response.status_code == 200
+        assert response.streaming
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        lines = b''.join(response.streaming_content).decode('utf-8').splitlines()
+        self.assertEqual([json.loads(line)['title'] for line in lines], ['Clean Room', 'Buy, Milk'])
+
+    def test_export_csv(self):
+        """
+        Ensure we can stream tasks as CSV.
+        """
+        access_token_1 = self.create_user_1()
+        headers1 = {
+           'Authorization': 'Bearer ' + access_token_1['token']['access']
+        }
+        self.create_tasks(headers1)
+        response = self.client.get('/tasks/export', headers = {**headers1, 'Accept': 'text/csv'})
+        assert response.status_code == 200
+        rows = list(csv.reader(b''.join(response.streaming_content).decode('utf-8').splitlines()))
+        self.assertEqual(rows[0], ['id', 'title', 'description', 'status', 'created', 'updated'])
+        self.assertEqual([row[1] for row in rows[1:]], ['Clean Room', 'Buy, Milk'])
+        # Datetimes as in the JSON responses and the NDJSON export
+        ndjson = self.client.get('/tasks/export', {'format': 'ndjson'}, headers = headers1)
+        first = json.loads(b''.join(ndjson.streaming_content).decode('utf-8').splitlines()[0])
+        self.assertEqual(rows[1][4:], [first['created'], first['updated']])
+        self.assertTrue(rows[1][4].endswith('Z'))
+
+    def test_export_errors(self):
+        """
+        Ensure export errors use the errors envelope.
+        """
+        for params in [{'format': 'ndjson'}, {'format': 'csv'}]:
+            response = self.client.get('/tasks/export', params)
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+            self.assertIn('detail', json.loads(response.content)['errors'])
+
+class TaskBulkTests(APITestCase):
+    """
+    Contains tests for bulk task operations
+    """
+    def create_user_1(self):
+        """
+        Common function for creating user
+        """
+        register_user = {
+            'name': 'Test',
+            'email': 'test@gmail.com',
+            'password': 'password',
+            'password_check': 'password',
+        }
+        response = self.client.post(register_url, register_user, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data
+
+    def test_bulk_create(self):
+        """
+        Ensure we can create many tasks in one request.
+        """
+        access_token_1 = self.create_user_1()
+        headers1 = {
+           'Authorization': 'Bearer ' + access_token_1['token']['access']
+        }
+        tasks_data = [
+            {'title': 'Clean Room', 'description': 'Need to clean my room'},
+            {'title': 'Buy Milk', 'description': 'Need to buy milk', 'status': Task.TaskStatus.IN_PROGRESS},
+        ]
+        response = self.client.post('/tasks/bulk', tasks_data, format='json', headers = headers1)
+        assert response.status_code == 201
+        self.assertEqual(Task.objects.count(), 2)
+        self.assertEqual(response.data, {
+            'data': [
+                {
+                    'id': 1,
+                    'title': 'Clean Room',
+                    'description': 'Need to clean my room',
+                    'status': Task.TaskStatus.PENDING,
+                    'user': 1,
+                },
+                {
+                    'id': 2,
+                    'title': 'Buy Milk',
+                    'description': 'Need to buy milk',
+                    'status': Task.TaskStatus.IN_PROGRESS,
+                    'user': 1,
+                },
+            ],
+            'msg': 'Tasks created'
+        })
+
+    def test_bulk_create_validation(self):
+        """
+        Ensure a batch with an invalid or duplicate item creates nothing.
+        """
+        access_token_1 = self.create_user_1()
+        headers1 = {
+           'Authorization': 'Bearer ' + access_token_1['token']['access']
+        }
+        self.client.post(task_creation_url, {'title': 'Clean Room', 'description': 'Old'}, format='json', headers = headers1)
+        tasks_data = [
+            {'title': 'Clean Room', 'description': 'Need to clean my room'},
+            {'title': 'Buy Milk', 'description': 'Need to buy milk'},
+            {'title': 'Buy Milk', 'description': 'Need to buy more milk'},
+            {'title': 'Buy Milk', 'description': 'Bought', 'status': Task.TaskStatus.COMPLETED},
+        ]
+        response = self.client.post('/tasks/bulk', tasks_data, format='json', headers = headers1)
+        assert response.status_code == 400
+        self.assertEqual(Task.objects.count(), 1)
+        duplicate = {'non_field_errors': ['There is already a non complete task']}
+        self.assertEqual(response.data, [duplicate, {}, duplicate, {}])
+
+        response = self.client.post('/tasks/bulk', [{'title': 'Buy Milk'}], format='json', headers = headers1)
+        assert response.status_code == 400
+        self.assertEqual(response.data, [{
+            'description': [exceptions.ErrorDetail(string='This field is required.', code='required')]
+        }])
+
+    def test_bulk_update_and_delete(self):
+        """
+        Ensure we can update and delete many tasks in one request, only for the current user.
+        """
+        access_token_1 = self.create_user_1()
+        headers1 = {
+           'Authorization': 'Bearer ' + access_token_1['token']['access']
+        }
+        tasks_data = [
+            {'title': 'Task %d' % i, 'description': 'Description %d' % i} for i in range(4)
+        ]
+        self.client.post('/tasks/bulk', tasks_data, format='json', headers = headers1)
+        self.assertEqual(Task.objects.count(), 4)
+
+        update_data = {'ids': [1, 2, 3], 'changes': {'status': Task.TaskStatus.COMPLETED}}
+        response = self.client.patch('/tasks/bulk', update_data, format='json', headers = headers1)
+        assert response.status_code == 200
+        self.assertEqual(response.data, {'data': {'updated': 3}, 'msg': 'Tasks updated'})
+        self.assertEqual(Task.objects.filter(status = Task.TaskStatus.COMPLETED).count(), 3)
+
+        update_data = {'filter': {'status': Task.TaskStatus.COMPLETED}, 'changes': {'title': 'Same'}}
+        response = self.client.patch('/tasks/bulk', update_data, format='json', headers = headers1)
+        assert response.status_code == 200
+
+        update_data = {'filter': {'status': Task.TaskStatus.COMPLETED}, 'changes': {'status': Task.TaskStatus.PENDING}}
+        response = self.client.patch('/tasks/bulk', update_data, format='json', headers = headers1)
+        assert response.status_code == 400
+        self.assertEqual(Task.objects.filter(status = Task.TaskStatus.COMPLETED).count(), 3)
+
+        response = self.client.delete('/tasks/bulk', {'ids': [2, 3, 99]}, format='json', headers = headers1)
+        assert response.status_code == 200
+        self.assertEqual(response.data, {'data': {'deleted': 2}, 'msg': 'Tasks deleted'})
+        self.assertEqual(Task.objects.count(), 2)
+
+        response = self.client.delete('/tasks/bulk', {}, format='json', headers = headers1)
+        assert response.status_code == 400
+
+    def test_bulk_delete_single_statement(self):
+        """
+        Ensure a bulk delete is one DELETE, with the deletion log written by a trigger.
+        """
+        access_token_1 = self.create_user_1()
+        headers1 = {
+           'Authorization': 'Bearer ' + access_token_1['token']['access']
+        }
+        tasks_data = [
+            {'title': 'Task %d' % i, 'description': 'Description %d' % i} for i in range(50)
+        ]
+        self.client.post('/tasks/bulk', tasks_data, format='json', headers = headers1)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.delete('/tasks/bulk', {'filter': {'status': Task.TaskStatus.PENDING}}, format='json', headers = headers1)
+        self.assertEqual(response.data['data'], {'deleted': 50})
+        task_queries = [query['sql'] for query in queries.captured_queries if '"todo_task"' in query['sql']]
+        self.assertEqual(len(task_queries), 1)
+        self.assertTrue(task_queries[0].startswith('DELETE'))
+        self.assertEqual(TaskTombstone.objects.count(), 50)
+        self.assertEqual(TaskStats.objects.get().pending, 0)
+
+class TaskRendererTests(SimpleTestCase):
+    """
+    Contains tests for the task renderer
+    """
+    def test_render_success(self):
+        """
+        Ensure success payloads are encoded once, to bytes, without an errors envelope.
+        """
+        stdlib_renderer = TaskRenderer()
+        stdlib_renderer.use_fast_encoder = False
+        for renderer in [TaskRenderer(), stdlib_renderer]:
+            content = renderer.render({'data': [{'title': 'Café'}]}, renderer_context={'response': Response(status=200)})
+            self.assertIsInstance(content, bytes)
+            self.assertEqual(json.loads(content), {'data': [{'title': 'Café'}]})
+
+    def test_render_errors(self):
+        """
+        Ensure error payloads are wrapped in an errors envelope only once.
+        """
+        renderer = TaskRenderer()
+        detail = {'detail': exceptions.ErrorDetail('Not found.', code='not_found')}
+        content = renderer.render(detail, renderer_context={'response': Response(status=404)})
+        self.assertEqual(json.loads(content), {'errors': {'detail': 'Not found.'}})
+        wrapped = {'errors': {'non_field_errors': ['There is already a non complete task']}}
+        content = renderer.render(wrapped, renderer_context={'response': Response(status=400)})
+        self.assertEqual(json.loads(content), wrapped)
+        content = renderer.render(detail)
+        self.assertEqual(json.loads(content), {'errors': {'detail': 'Not found.'}})
+
+class TaskConditionalGetTests(APITestCase):
+    """
+    Contains tests for conditional task requests
+    """
+    def create_user_1(self):
+        """
+        Common function for creating user
+        """
+        register_user = {
+            'name': 'Test',
+            'email': 'test@gmail.com',
+            'password': 'password',
+            'password_check': 'password',
+        }
+        response = self.client.post(register_url, register_user, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data
+
+    def test_task_list_etag(self):
+        """
+        Ensure an unchanged task list is answered with a 304.
+        """
+        access_token_1 = self.create_user_1()
+        headers1 = {
+           'Authorization': 'Bearer ' + access_token_1['token']['access']
+        }
+        task_data = {
+            'title': 'Clean Room',
+            'description': 'Need to clean my room and change bed sheets',
+        }
+        self.client.post(task_creation_url, task_data, format='json', headers = headers1)
+        response = self.client.get(task_creation_url, headers = headers1)
+        assert response.status_code == 200
+        etag = response['ETag']
+
+        response = self.client.get(task_creation_url, headers = {**headers1, 'If-None-Match': etag})
+        assert response.status_code == 304
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], etag)
+
+        response = self.client.get(task_creation_url, {'page_size': 1}, headers = {**headers1, 'If-None-Match': etag})
+        assert response.status_code == 200
+
+        self.client.delete('/tasks/1', headers = headers1)
+        response = self.client.get(task_creation_url, headers = {**headers1, 'If-None-Match': etag})
+        assert response.status_code == 200
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_task_detail_etag(self):
+        """
+        Ensure an unchanged task is answered with a 304 until it is updated.
+        """
+        access_token_1 = self.create_user_1()
+        headers1 = {
+           'Authorization': 'Bearer ' + access_token_1['token']['access']
+        }
+        task_data = {
+            'title': 'Clean Room',
+            'description': 'Need to clean my room and change bed sheets',
+        }
+        self.client.post(task_creation_url, task_data, format='json', headers = headers1)
+        response = self.client.get('/tasks/1', headers = headers1)
+        assert response.status_code == 200
+        etag = response['ETag']
+        self.assertTrue(response.has_header('Last-Modified'))
+
+        response = self.client.get('/tasks/1', headers = {**headers1, 'If-None-Match': etag})
+        assert response.status_code == 304
+
+        response = self.client.get('/tasks/1', headers = {**headers1, 'If-Modified-Since': response['Last-Modified']})
+        assert response.status_code == 304
+
+        self.client.put('/tasks/1', {**task_data, 'status': Task.TaskStatus.COMPLETED}, format='json', headers = headers1)
+        response = self.client.get('/tasks/1', headers = {**headers1, 'If-None-Match': etag})
+        assert response.status_code == 200
+
+class TaskCacheTests(APITestCase):
+    """
+    Contains tests for the task read-through cache
+    """
+    def create_user_1(self):
+        """
+        Common function for creating user
+        """
+        register_user = {
+            'name': 'Test',
+            'email': 'test@gmail.com',
+            'password': 'password',
+            'password_check': 'password',
+        }
+        response = self.client.post(register_url, register_user, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data
+
+    def check_cached_reads(self, validator_queries = 0):
+        """
+        Common function checking reads are served from cache until a write.
+        """
+        access_token_1 = self.create_user_1()
+        headers1 = {
+           'Authorization': 'Bearer ' + access_token_1['token']['access']
+        }
+        task_data = {
+            'title': 'Clean Room',
+            'description': 'Need to clean my room and change bed sheets',
+        }
+        self.client.post(task_creation_url, task_data, format='json', headers = headers1)
+        self.client.get(task_creation_url, headers = headers1)
+        self.client.get('/tasks/1', headers = headers1)
+        with self.assertNumQueries(validator_queries):
+            response = self.client.get(task_creation_url, headers = headers1)
+        self.assertEqual(len(response.data['data']), 1)
+        with self.assertNumQueries(validator_queries):
+            response = self.client.get('/tasks/1', headers = headers1)
+        self.assertEqual(response.data['data']['status'], Task.TaskStatus.PENDING)
+
+        self.client.put('/tasks/1', {**task_data, 'status': Task.TaskStatus.COMPLETED}, format='json', headers = headers1)
+        response = self.client.get('/tasks/1', headers = headers1)
+        self.assertEqual(response.data['data']['status'], Task.TaskStatus.COMPLETED)
+        self.client.post('/tasks/bulk', [{'title': 'Buy Milk', 'description': 'Milk'}], format='json', headers = headers1)
+        response = self.client.get(task_creation_url, headers = headers1)
+        self.assertEqual(len(response.data['data']), 2)
+
+    async def test_write_during_compute(self):
+        """
+        Ensure a value computed while a write invalidates the user's entries is not cached for the new generation.
+        """
+        def compute():
+            cache.invalidate(1)
+            return 'stale'
+
+        async def acompute():
+            await sync_to_async(cache.invalidate)(1)
+            return 'stale'
+
+        self.assertEqual(await sync_to_async(cache.get_or_set)(1, compute, 'detail', '/tasks/1'), 'stale')
+        self.assertEqual(await sync_to_async(cache.get_or_set)(1, lambda: 'fresh', 'detail', '/tasks/1'), 'fresh')
+        self.assertEqual(await cache.aget_or_set(1, acompute, 'detail', '/tasks/2'), 'stale')
+
+        async def afresh():
+            return 'fresh'
+
+        self.assertEqual(await cache.aget_or_set(1, afresh, 'detail', '/tasks/2'), 'fresh')
+
+    def test_locmem_cache(self):
+        """
+        Ensure task reads are cached in local memory and invalidated on writes, validators are not cached there.
+        """
+        caches = {
+            **settings.CACHES,
+            'tasks': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                'LOCATION': 'tasks-test',
+            },
+        }
+        with self.settings(CACHES = caches):
+            self.check_cached_reads(validator_queries = 1)
+
+    def test_sqlite_cache(self):
+        """
+        Ensure task reads are cached in the SQLite file and invalidated on writes, expired entries are dropped.
+        """
+        self.assertIsInstance(cache.get_cache(), cache.SQLiteCache)
+        self.check_cached_reads()
+
+        tasks_cache = cache.get_cache()
+        self.assertFalse(tasks_cache.add(cache.generation_key(1), 'other', timeout = None))
+        tasks_cache.set('expired', 'value', timeout = -1)
+        self.assertIsNone(tasks_cache.get('expired'))
+        self.assertTrue(tasks_cache.add('expired', 'again'))
+        self.assertEqual(tasks_cache.get('expired'), 'again')
+        tasks_cache.set('expired', 'value', timeout = -1)
+        tasks_cache.set('other', 'value')
+        count = tasks_cache.connect().execute("SELECT COUNT(*) FROM entries WHERE key LIKE '%expired'").fetchone()[0]
+        self.assertEqual(count, 0)
+
+    def test_file_based_cache(self):
+        """
+        Ensure task reads are cached on disk and invalidated on writes.
+        """
+        with tempfile.TemporaryDirectory() as cache_dir:
+            caches = {
+                **settings.CACHES,
+                'tasks': {
+                    'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                    'LOCATION': cache_dir,
+                },
+            }
+            with self.settings(CACHES = caches):
+                self.check_cached_reads()
+
+@override_settings(ROOT_URLCONF='todo.asgi_urls')
+class AsyncTaskViewTests(APITestCase):
+    """
+    Contains tests for the native async task views
+    """
+    async def register(self):
+        """
+        Common function for registering a user
+        """
+        register_user = {
+            'name': 'Test',
+            'email': 'test@gmail.com',
+            'password': 'password',
+            'password_check': 'password',
+        }
+        response = await self.async_client.post(register_url, register_user, content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return {
+           'Authorization': 'Bearer ' + response.json()['token']['access']
+        }
+
+    async def test_async_task_crud(self):
+        """
+        Ensure we can create, list, get, update and delete tasks through the async views.
+        """
+        headers = await self.register()
+        task_data = {
+            'title': 'Clean Room',
+            'description': 'Need to clean my room and change bed sheets',
+        }
+        response = await self.async_client.post(task_creation_url, task_data, content_type='application/json', headers = headers)
+        assert response.status_code == 201
+        self.assertEqual(response.json(), {
+            'data' : {
+                'id': 1,
+                'title': 'Clean Room',
+                'description': 'Need to clean my room and change bed sheets',
+                'status' : Task.TaskStatus.PENDING,
+                'user': 1
+            },
+            'msg' : 'Task created'
+        })
+        response = await self.async_client.get(task_creation_url, headers = headers)
+        self.assertEqual([task['title'] for task in response.json()['data']], ['Clean Room'])
+
+        update_data = {**task_data, 'status': Task.TaskStatus.COMPLETED}
+        response = await self.async_client.put('/tasks/1', update_data, content_type='application/json', headers = headers)
+        assert response.status_code == 200
+        response = await self.async_client.get('/tasks/1', headers = headers)
+        self.assertEqual(response.json()['data']['status'], Task.TaskStatus.COMPLETED)
+
+        response = await self.async_client.delete('/tasks/1', headers = headers)
+        assert response.status_code == 200
+        response = await self.async_client.get('/tasks/1', headers = headers)
+        assert response.status_code == 404
+        self.assertEqual(response.json(), {'errors': {'detail': 'No Task matches the given query.'}})
+
+    async def test_async_authentication(self):
+        """
+        Ensure the async views reject unauthenticated requests.
+        """
+        response = await self.async_client.get(task_creation_url)
+        assert response.status_code == 401
+        self.assertEqual(response.json(), {
+            'errors': {'detail': 'Authentication credentials were not provided.'}
+        })
+
+    async def test_async_conditional_get(self):
+        """
+        Ensure the async list and detail views send validators and answer revalidations with a 304.
+        """
+        headers = await self.register()
+        task_data = {
+            'title': 'Clean Room',
+            'description': 'Need to clean my room and change bed sheets',
+        }
+        await self.async_client.post(task_creation_url, task_data, content_type='application/json', headers = headers)
+        for url in [task_creation_url, task_creation_url + '/1']:
+            with self.subTest(url = url):
+                response = await self.async_client.get(url, headers = headers)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertIn('ETag', response)
+                self.assertIn('Accept', response['Vary'])
+                self.assertIn('Authorization', response['Vary'])
+
+                revalidated = await self.async_client.get(url, headers = {**headers, 'If-None-Match': response['ETag']})
+                self.assertEqual(revalidated.status_code, status.HTTP_304_NOT_MODIFIED)
+                self.assertEqual(revalidated.content, b'')
+
+        await self.async_client.put(task_creation_url + '/1', {**task_data, 'title': 'Changed'}, content_type='application/json', headers = headers)
+        response = await self.async_client.get(task_creation_url + '/1', headers = {**headers, 'If-None-Match': revalidated['ETag']})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+class BenchCommandTests(SimpleTestCase):
+    """
+    Contains tests for the benchmark baseline comparison
+    """
+    def test_compare(self):
+        """
+        Ensure extra queries and bigger responses, and slower ones when asked, are reported as regressions.
+        """
+        baseline = {'endpoints': {'list': {'p95_ms': 10, 'queries': 1, 'bytes': 100}}}
+        report = {'endpoints': {'list': {'p95_ms': 14, 'queries': 1, 'bytes': 100}, 'new': {'p95_ms': 1, 'queries': 1, 'bytes': 1}}}
+        self.assertEqual(BenchCommand().compare(baseline, report, tolerance=0.5), [])
+        report = {'endpoints': {'list': {'p95_ms': 40, 'queries': 2, 'bytes': 160}}}
+        self.assertEqual(BenchCommand().compare(baseline, report, tolerance=0.5), [
+            'list: 2 queries per request, baseline 1',
+            'list: bytes 160, baseline 100',
+        ])
+
+        # Latency is opt-in and must also grow by more than the absolute slack
+        report = {'endpoints': {'list': {'p95_ms': 16, 'queries': 1, 'bytes': 100}}}
+        self.assertEqual(BenchCommand().compare(baseline, report, tolerance=0.5, latency_slack_ms=1), ['list: p95_ms 16, baseline 10'])
+        self.assertEqual(BenchCommand().compare(baseline, report, tolerance=0.5, latency_slack_ms=10), [])
+
+    def test_config_mismatch(self):
+        """
+        Ensure a run is only compared against a baseline made with the same settings.
+        """
+        baseline = {'config': {'users': 20, 'tasks': 50, 'requests': 30}, 'endpoints': {}}
+        report = {'config': {'users': 20, 'tasks': 50, 'requests': 30}, 'endpoints': {}}
+        self.assertEqual(BenchCommand().config_mismatch(baseline, report), {})
+        report['config']['requests'] = 10
+        self.assertEqual(BenchCommand().config_mismatch(baseline, report), {'requests': 30})
+        self.assertEqual(BenchCommand().config_mismatch({'endpoints': {}}, report), {'users': None, 'tasks': None, 'requests': None})
+
+class ServerTimingTests(APITestCase):
+    """
+    Contains tests for the Server-Timing instrumentation
+    """
+    def test_server_timing(self):
+        """
+        Ensure task responses report their phases in a header and a log line.
+        """
+        register_user = {
+            'name': 'Test',
+            'email': 'test@gmail.com',
+            'password': 'password',
+            'password_check': 'password',
+        }
+        response = self.client.post(register_url, register_user, format='json')
+        headers = {
+           'Authorization': 'Bearer ' + response.data['token']['access']
+        }
+        task_data = {
+            'title': 'Clean Room',
+            'description': 'Need to clean my room and change bed sheets',
+        }
+        with self.assertLogs('todo.timing', 'INFO') as logs:
+            response = self.client.post(task_creation_url, task_data, format='json', headers = headers)
+        phases = [metric.split(';')[0] for metric in response['Server-Timing'].split(', ')]
+        self.assertEqual(phases, ['auth', 'db', 'serialize', 'render', 'total'])
+        self.assertIn('queries"', response['Server-Timing'])
+        line = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(line['view'], 'tasks')
+        self.assertEqual(line['status'], 201)
+        self.assertGreater(line['db_queries'], 0)
+
+class MetricsTests(APITestCase):
+    """
+    Contains tests for the /metrics endpoint
+    """
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.metrics_dir = directory.name
+        settings_override = override_settings(METRICS_DIR = self.metrics_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_metrics_aggregate_process_files(self):
+        """
+        Ensure the values written by every worker process file are summed.
+        """
+        key = metrics.sample_key('todo_http_requests_total', {'view': 'tasks'})
+        for worker, amount in ((1, 2), (2, 3)):
+            values = metrics.MmapValues('%s/metrics_%d.db' % (self.metrics_dir, worker))
+            values.inc(key, amount)
+            values.close()
+        values = metrics.MmapValues('%s/metrics_1.db' % self.metrics_dir)
+        values.inc(key, 1)
+        for i in range(2000):
+            values.inc(metrics.sample_key('todo_cache_requests_total', {'entry': str(i)}), 1)
+        values.close()
+        totals = metrics.collect(self.metrics_dir)
+        self.assertEqual(totals[key], 6)
+        self.assertEqual(len(totals), 2001)
+
+    def test_metrics_endpoint(self):
+        """
+        Ensure requests, latency and query histograms and cache lookups are exposed.
+        """
+        register_user = {
+            'name': 'Test',
+            'email': 'test@gmail.com',
+            'password': 'password',
+            'password_check': 'password',
+        }
+        response = self.client.post(register_url, register_user, format='json')
+        headers = {
+           'Authorization': 'Bearer ' + response.data['token']['access']
+        }
+        self.client.get(task_creation_url, headers = headers)
+        self.client.get(task_creation_url, headers = headers)
+
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        lines = response.content.decode().splitlines()
+        self.assertIn('# TYPE todo_http_request_duration_seconds histogram', lines)
+        self.assertIn('todo_http_requests_total{method="GET",status="200",view="tasks"} 2.0', lines)
+        self.assertIn('todo_http_requests_total{method="POST",status="201",view="register"} 1.0', lines)
+        self.assertIn('todo_http_request_duration_seconds_count{view="tasks"} 2.0', lines)
+        self.assertIn('todo_http_request_duration_seconds_bucket{le="+Inf",view="tasks"} 2.0', lines)
+        self.assertIn('todo_db_queries_per_request_count{view="tasks"} 2.0', lines)
+        self.assertIn('todo_cache_requests_total{cache="tasks",entry="list",result="hit"} 1.0', lines)
+        self.assertIn('todo_cache_requests_total{cache="tasks",entry="list",result="miss"} 1.0', lines)
+        self.assertIn('todo_password_hash_duration_seconds_count 1.0', lines)
+
+    def test_metrics_methods_bounded(self):
+        """
+        Ensure non standard request methods share one series.
+        """
+        for method in ('FOO', 'BAR'):
+            self.client.generic(method, task_creation_url)
+        lines = self.client.get('/metrics').content.decode().splitlines()
+        self.assertIn('todo_http_requests_total{method="other",status="401",view="tasks"} 2.0', lines)
+        self.assertFalse([line for line in lines if 'method="FOO"' in line])
+
+    def test_metrics_access(self):
+        """
+        Ensure /metrics is only served to allowed addresses and to the metrics token.
+        """
+        remote = {'REMOTE_ADDR': '203.0.113.5', 'HTTP_X_FORWARDED_FOR': '127.0.0.1'}
+        self.assertEqual(self.client.get('/metrics', **remote).status_code, status.HTTP_403_FORBIDDEN)
+        with self.settings(METRICS_TOKEN = 'secret'):
+            response = self.client.get('/metrics', HTTP_AUTHORIZATION = 'Bearer wrong', **remote)
+            self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+            response = self.client.get('/metrics', HTTP_AUTHORIZATION = 'Bearer secret', **remote)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        with self.settings(METRICS_ALLOWED_IPS = ['203.0.113.5']):
+            self.assertEqual(self.client.get('/metrics', **remote).status_code, status.HTTP_200_OK)
+
+class SQLiteProfileTests(SimpleTestCase):
+    """
+    Contains tests for the production SQLite profile
+    """
+    writers = 8
+    transactions = 25
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        database = {
+            **connection.settings_dict,
+            **settings.DATABASE_PROFILES['production'],
+            'NAME': directory.name + '/stress.sqlite3',
+        }
+        patcher = mock.patch.dict(connections.settings, {'stress': database})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(connections.__delitem__, 'stress')
+
+    def test_pragmas_applied(self):
+        """
+        Ensure new connections of the profile run its PRAGMAs.
+        """
+        try:
+            with connections['stress'].cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode')
+                self.assertEqual(cursor.fetchone()[0], 'wal')
+                cursor.execute('PRAGMA busy_timeout')
+                self.assertEqual(cursor.fetchone()[0], 5000)
+                cursor.execute('PRAGMA synchronous')
+                self.assertEqual(cursor.fetchone()[0], 1)
+        finally:
+            connections['stress'].close()
+
+    def test_concurrent_writers(self):
+        """
+        Ensure writer threads running read-then-write transactions never hit a lock error.
+        """
+        with connections['stress'].cursor() as cursor:
+            cursor.execute('CREATE TABLE stress (id INTEGER PRIMARY KEY, writer INTEGER, seen INTEGER)')
+        connections['stress'].close()
+        errors = []
+
+        def write(writer):
+            try:
+                for _ in range(self.transactions):
+                    with transaction.atomic(using = 'stress'):
+                        with connections['stress'].cursor() as cursor:
+                            cursor.execute('SELECT COUNT(*) FROM stress')
+                            seen = cursor.fetchone()[0]
+                            cursor.execute('INSERT INTO stress (writer, seen) VALUES (%s, %s)', [writer, seen])
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connections['stress'].close()
+
+        threads = [threading.Thread(target = write, args = (writer,)) for writer in range(self.writers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        try:
+            with connections['stress'].cursor() as cursor:
+                cursor.execute('SELECT COUNT(*), COUNT(DISTINCT seen) FROM stress')
+                # Every transaction saw all the previous ones, none ran concurrently
+                self.assertEqual(cursor.fetchone(), (self.writers * self.transactions, self.writers * self.transactions))
+        finally:
+            connections['stress'].close()
+
+class ReadReplicaTests(APITestCase):
+    """
+    Contains tests for the read replica router
+    """
+    def setUp(self):
+        cache.get_cache().clear()
+
+    def create_user_1(self):
+        register_user = {
+            'name': 'Test',
+            'email': 'test@gmail.com',
+            'password': 'password',
+            'password_check': 'password',
+        }
+        response = self.client.post(register_url, register_user, format='json')
+        return {
+           'Authorization': 'Bearer ' + response.data['token']['access']
+        }
+
+    def test_replica_pin_cache_check(self):
+        """
+        Ensure replicas are refused with a per-process tasks cache, the primary pins would not reach other workers.
+        """
+        self.assertEqual(check_replica_pin_cache(None), [])
+        locmem = {**settings.CACHES, 'tasks': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        with self.settings(CACHES = locmem):
+            self.assertEqual(check_replica_pin_cache(None), [])
+            with self.settings(DATABASE_REPLICAS = ['replica']):
+                self.assertEqual([error.id for error in check_replica_pin_cache(None)], ['todo.E001'])
+
+    @override_settings(DATABASE_REPLICAS = ['replica'])
+    def test_router(self):
+        """
+        Ensure only Task and User reads inside replica_reads() go to a replica.
+        """
+        router = ReadReplicaRouter()
+        self.assertIsNone(router.db_for_read(Task))
+        with routers.replica_reads(1):
+            self.assertEqual(router.db_for_read(Task), 'replica')
+            self.assertEqual(router.db_for_read(User), 'replica')
+            self.assertEqual(router.db_for_write(Task), 'default')
+            routers.pin_to_primary(1)
+            with routers.replica_reads(1):
+                self.assertEqual(router.db_for_read(Task), 'default')
+        self.assertFalse(router.allow_migrate('replica', 'todo'))
+        self.assertIsNone(router.allow_migrate('default', 'todo'))
+
+    # The primary stands in for the replica, so the GET handlers can still query it
+    @override_settings(DATABASE_REPLICAS = ['default'])
+    def test_read_your_writes(self):
+        """
+        Ensure GET handlers read from a replica, except right after a write of the same user.
+        """
+        headers = self.create_user_1()
+        with mock.patch.object(routers, 'choose_replica', wraps = routers.choose_replica) as choose_replica:
+            response = self.client.get(task_creation_url, headers = headers)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(choose_replica.call_count, 1)
+
+            task_data = {
+                'title': 'Clean Room',
+                'description': 'Need to clean my room and change bed sheets',
+            }
+            response = self.client.post(task_creation_url, task_data, format='json', headers = headers)
+            response = self.client.get(task_creation_url, headers = headers)
+            self.assertEqual(len(response.data['data']), 1)
+            response = self.client.get(task_creation_url + '/' + str(response.data['data'][0]['id']), headers = headers)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(choose_replica.call_count, 1)
+
+    def test_sync_replica(self):
+        """
+        Ensure the replica file is a copy of the primary after a sync.
+        """
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        primary = sqlite3.connect(directory.name + '/primary.sqlite3')
+        primary.execute('CREATE TABLE t (id INTEGER PRIMARY KEY)')
+        primary.executemany('INSERT INTO t VALUES (?)', [(i,) for i in range(100)])
+        primary.commit()
+        primary.close()
+        databases = {
+            alias: {**connection.settings_dict, 'NAME': '%s/%s.sqlite3' % (directory.name, alias)}
+            for alias in ('primary', 'copy')
+        }
+        with mock.patch.dict(connections.settings, databases):
+            routers.sync_replica('copy', source_alias = 'primary')
+        replica = sqlite3.connect(directory.name + '/copy.sqlite3')
+        self.assertEqual(replica.execute('SELECT COUNT(*) FROM t').fetchone(), (100,))
+        replica.close()
+
+class TaskSearchTests(APITestCase):
+    """
+    Contains tests for full text search of tasks
+    """
+    def create_user(self, email):
+        register_user = {
+            'name': 'Test',
+            'email': email,
+            'password': 'password',
+            'password_check': 'password',
+        }
+        response = self.client.post(register_url, register_user, format='json')
+        return {
+           'Authorization': 'Bearer ' + response.data['token']['access']
+        }
+
+    def search(self, headers, q, **params):
+        response = self.client.get(task_creation_url + '/search', {'q': q, **params}, headers = headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [task['title'] for task in response.data['data']]
+
+    def test_search(self):
+        """
+        Ensure search ranks the user's matching tasks and follows their writes.
+        """
+        headers1 = self.create_user('test@gmail.com')
+        headers2 = self.create_user('test1@gmail.com')
+        tasks = [
+            ('Groceries', 'Buy milk, eggs and a room freshener'),
+            ('Clean room', 'Need to clean my room and change bed sheets'),
+            ('Call mom', 'About the weekend'),
+        ]
+        for title, description in tasks:
+            self.client.post(task_creation_url, {'title': title, 'description': description}, format='json', headers = headers1)
+        self.client.post(task_creation_url, {'title': 'Clean room', 'description': 'Other user'}, format='json', headers = headers2)
+
+        self.assertEqual(self.search(headers1, 'room'), ['Clean room', 'Groceries'])
+        self.assertEqual(self.search(headers1, 'roo'), ['Clean room', 'Groceries'])
+        self.assertEqual(self.search(headers1, 'clean sheets'), ['Clean room'])
+        self.assertEqual(self.search(headers1, 'room', page_size = 1), ['Clean room'])
+        self.assertEqual(self.search(headers1, 'Weekend" OR title:*'), [])
+        self.assertEqual(self.search(headers2, 'room'), ['Clean room'])
+        # The owner token scopes the index lookup, it is not searchable itself
+        user_id = User.objects.get(email = 'test@gmail.com').id
+        self.assertEqual(self.search(headers1, 'u%d' % user_id), [])
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM todo_task_fts WHERE todo_task_fts MATCH %s', [search.match_query(user_id, 'room')])
+            self.assertEqual(cursor.fetchone()[0], 2)
+        response = self.client.get(task_creation_url + '/search', {'q': 'room', 'fields': 'id,title'}, headers = headers1)
+        self.assertEqual(response.data['data'][0], {'id': 2, 'title': 'Clean room'})
+
+        task = {'title': 'Call dad', 'description': 'About the room', 'status': Task.TaskStatus.PENDING}
+        self.client.put(task_creation_url + '/3', task, format='json', headers = headers1)
+        self.assertEqual(self.search(headers1, 'mom'), [])
+        self.assertEqual(self.search(headers1, 'dad'), ['Call dad'])
+        self.client.patch(task_creation_url + '/bulk', {'ids': [1], 'changes': {'title': 'Shopping'}}, format='json', headers = headers1)
+        self.assertEqual(self.search(headers1, 'shopping'), ['Shopping'])
+        self.client.delete(task_creation_url + '/2', headers = headers1)
+        self.assertEqual(self.search(headers1, 'sheets'), [])
+
+        call_command('rebuild_search_index', stdout = StringIO())
+        self.assertEqual(self.search(headers1, 'room'), ['Call dad', 'Shopping'])
+
+        response = self.client.get(task_creation_url + '/search', headers = headers1)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+@override_settings(TASK_CHANGES_SETTLE_SECONDS = 0)
+class TaskChangesTests(APITestCase):
+    """
+    Contains tests for the delta sync endpoint
+    """
+    changes_url = task_creation_url + '/changes'
+
+    def create_user_1(self):
+        register_user = {
+            'name': 'Test',
+            'email': 'test@gmail.com',
+            'password': 'password',
+            'password_check': 'password',
+        }
+        response = self.client.post(register_url, register_user, format='json')
+        return {
+           'Authorization': 'Bearer ' + response.data['token']['access']
+        }
+
+    def test_changes(self):
+        """
+        Ensure a sync returns only what changed and deleted since the previous token.
+        """
+        headers = self.create_user_1()
+        for i in range(3):
+            self.client.post(task_creation_url, {'title': 'Task %d' % i, 'description': 'Description'}, format='json', headers = headers)
+
+        response = self.client.get(self.changes_url, headers = headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([task['id'] for task in response.data['data']], [1, 2, 3])
+        self.assertEqual(response.data['deleted'], [])
+        self.assertFalse(response.data['has_more'])
+        token = response.data['token']
+
+        response = self.client.get(self.changes_url, {'since': token}, headers = headers)
+        self.assertEqual(response.data['data'], [])
+
+        task = {'title': 'Task 1', 'description': 'Changed', 'status': Task.TaskStatus.IN_PROGRESS}
+        self.client.put(task_creation_url + '/2', task, format='json', headers = headers)
+        self.client.delete(task_creation_url + '/3', headers = headers)
+        self.client.post(task_creation_url, {'title': 'Task 4', 'description': 'Description'}, format='json', headers = headers)
+        response = self.client.get(self.changes_url, {'since': token, 'fields': 'id,description'}, headers = headers)
+        self.assertEqual(response.data['data'], [{'id': 2, 'description': 'Changed'}, {'id': 4, 'description': 'Description'}])
+        self.assertEqual(response.data['deleted'], [3])
+        token = response.data['token']
+
+        self.client.delete(task_creation_url + '/bulk', {'ids': [1, 2]}, format='json', headers = headers)
+        first_page = self.client.get(self.changes_url, {'since': token, 'page_size': 1}, headers = headers)
+        self.assertEqual(len(first_page.data['deleted']), 1)
+        self.assertTrue(first_page.data['has_more'])
+        response = self.client.get(self.changes_url, {'since': first_page.data['token'], 'page_size': 1}, headers = headers)
+        self.assertEqual(sorted(first_page.data['deleted'] + response.data['deleted']), [1, 2])
+        self.assertEqual(response.data['data'], [])
+        self.assertFalse(response.data['has_more'])
+
+    def test_changes_tokens(self):
+        """
+        Ensure malformed tokens are rejected and tokens older than the deletion log expire.
+        """
+        headers = self.create_user_1()
+        for token in ['not-a-token', sync.encode_token(None, (timezone.now().replace(tzinfo = None), 1))]:
+            response = self.client.get(self.changes_url, {'since': token}, headers = headers)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(response.data['since'], ['Invalid sync token'])
+
+        old = timezone.now() - timedelta(days = settings.TASK_TOMBSTONE_RETENTION_DAYS + 1)
+        response = self.client.get(self.changes_url, {'since': sync.encode_token(None, (old, 0))}, headers = headers)
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+
+    def test_changes_token_without_deletions(self):
+        """
+        Ensure a client syncing regularly keeps a valid token when nothing is deleted for longer than the retention period.
+        """
+        headers = self.create_user_1()
+        self.client.post(task_creation_url, {'title': 'Task 1', 'description': 'Description'}, format='json', headers = headers)
+        user_id = User.objects.get().id
+        start = timezone.now()
+        days = settings.TASK_TOMBSTONE_RETENTION_DAYS + 2
+        token = sync.get_changes(user_id, None, 10)[2]
+        for day in range(1, days):
+            with mock.patch('todo.sync.timezone.now', return_value = start + timedelta(days = day)):
+                token = sync.get_changes(user_id, token, 10)[2]
+
+        self.client.delete(task_creation_url + '/1', headers = headers)
+        TaskTombstone.objects.update(deleted = start + timedelta(days = days - 0.5))
+        with mock.patch('todo.sync.timezone.now', return_value = start + timedelta(days = days)):
+            _, deleted, _, _ = sync.get_changes(user_id, token, 10)
+        self.assertEqual(deleted, [1])
+
+    def test_tombstone_retention(self):
+        """
+        Ensure old tombstones are purged and deleting a user leaves none behind.
+        """
+        headers = self.create_user_1()
+        for i in range(2):
+            self.client.post(task_creation_url, {'title': 'Task %d' % i, 'description': 'Description'}, format='json', headers = headers)
+        self.client.delete(task_creation_url + '/1', headers = headers)
+        TaskTombstone.objects.update(deleted = timezone.now() - timedelta(days = settings.TASK_TOMBSTONE_RETENTION_DAYS + 1))
+        self.client.delete(task_creation_url + '/2', headers = headers)
+        call_command('purge_task_tombstones', stdout = StringIO())
+        self.assertEqual(list(TaskTombstone.objects.values_list('task_id', flat = True)), [2])
+
+        self.client.post(task_creation_url, {'title': 'Task 3', 'description': 'Description'}, format='json', headers = headers)
+        User.objects.all().delete()
+        self.assertEqual(TaskTombstone.objects.count(), 0)
+
+class TaskStatsTests(APITestCase):
+    """
+    Contains tests for the task status counters
+    """
+    stats_url = task_creation_url + '/stats'
+
+    def create_user_1(self):
+        register_user = {
+            'name': 'Test',
+            'email': 'test@gmail.com',
+            'password': 'password',
+            'password_check': 'password',
+        }
+        response = self.client.post(register_url, register_user, format='json')
+        return {
+           'Authorization': 'Bearer ' + response.data['token']['access']
+        }
+
+    def assertStats(self, headers, pending, in_progress, completed):
+        response = self.client.get(self.stats_url, headers = headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['data'], {
+            'pending': pending,
+            'in_progress': in_progress,
+            'completed': completed,
+            'total': pending + in_progress + completed,
+        })
+
+    def test_stats(self):
+        """
+        Ensure the counters follow creates, status changes and deletes on every path.
+        """
+        headers = self.create_user_1()
+        self.assertStats(headers, 0, 0, 0)
+        self.client.post(task_creation_url, {'title': 'Task 0', 'description': 'Description'}, format='json', headers = headers)
+        tasks = [{'title': 'Task %d' % i, 'description': 'Description', 'status': 'COMPLETED'} for i in range(1, 4)]
+        self.client.post(task_creation_url + '/bulk', tasks, format='json', headers = headers)
+        self.assertStats(headers, 1, 0, 3)
+
+        task = {'title': 'Task 0', 'description': 'Description', 'status': Task.TaskStatus.IN_PROGRESS}
+        self.client.put(task_creation_url + '/1', task, format='json', headers = headers)
+        self.assertStats(headers, 0, 1, 3)
+        self.client.patch(task_creation_url + '/bulk', {'ids': [2, 3], 'changes': {'status': 'PENDING'}}, format='json', headers = headers)
+        self.assertStats(headers, 2, 1, 1)
+        self.client.delete(task_creation_url + '/4', headers = headers)
+        self.client.delete(task_creation_url + '/bulk', {'filter': {'status': 'PENDING'}}, format='json', headers = headers)
+        self.assertStats(headers, 0, 1, 0)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(stats.get_stats(1)['total'], 1)
+
+    def test_reconcile(self):
+        """
+        Ensure the reconciliation command repairs drifted counters.
+        """
+        headers = self.create_user_1()
+        self.client.post(task_creation_url, {'title': 'Task 0', 'description': 'Description'}, format='json', headers = headers)
+        TaskStats.objects.update(pending = 5, completed = -1)
+        out = StringIO()
+        call_command('reconcile_task_stats', stdout = out)
+        self.assertIn('1 users', out.getvalue())
+        self.assertStats(headers, 1, 0, 0)
+        call_command('reconcile_task_stats', stdout = out)
+        self.assertIn('0 users', out.getvalue())
+
+class ThrottlingTests(APITestCase):
+    """
+    Contains tests for the token bucket throttling
+    """
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = directory.name + '/throttle.sqlite3'
+
+    def create_user_1(self):
+        register_user = {
+            'name': 'Test',
+            'email': 'test@gmail.com',
+            'password': 'password',
+            'password_check': 'password',
+        }
+        response = self.client.post(register_url, register_user, format='json')
+        return {
+           'Authorization': 'Bearer ' + response.data['token']['access']
+        }
+
+    def test_bucket_stores(self):
+        """
+        Ensure buckets refill over time and are shared by every process using the store.
+        """
+        # Two instances on one file stand for two worker processes
+        for first, second in [(SQLiteBucketStore(self.path), SQLiteBucketStore(self.path)), (CacheBucketStore('default'), CacheBucketStore('default'))]:
+            with self.subTest(store = type(first).__name__):
+                first.clear()
+                self.assertEqual(first.take('key', 2, 1, now = 100), (True, 1))
+                self.assertEqual(second.take('key', 2, 1, now = 100), (True, 0))
+                self.assertEqual(first.take('key', 2, 1, now = 100.5), (False, 0.5))
+                self.assertEqual(second.take('key', 2, 1, now = 101), (True, 0))
+                self.assertEqual(first.take('key', 2, 1, now = 200), (True, 1))
+                self.assertEqual(first.take('other', 2, 1, now = 200), (True, 1))
+
+    def test_task_endpoints_throttled(self):
+        """
+        Ensure the sync and async task endpoints are throttled per user.
+        """
+        headers = self.create_user_1()
+        for urlconf in ['todo.urls', 'todo.asgi_urls']:
+            throttling = {
+                **settings.THROTTLING,
+                'ENABLED': True,
+                'STORE': 'sqlite',
+                'PATH': '%s.%s' % (self.path, urlconf),
+                'RATES': {'tasks_user': '2/min'},
+            }
+            with self.subTest(urlconf = urlconf), override_settings(ROOT_URLCONF = urlconf, THROTTLING = throttling):
+                for _ in range(2):
+                    response = self.client.get(task_creation_url, headers = headers)
+                    self.assertEqual(response.status_code, status.HTTP_200_OK)
+                response = self.client.get(task_creation_url + '/1', headers = headers)
+                self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+                self.assertEqual(response['Retry-After'], '30')
+
+class IdempotencyTests(APITestCase):
+    """
+    Contains tests for the Idempotency-Key header of task creation and updates
+    """
+    task_data = {
+        'title': 'Clean Room',
+        'description': 'Need to clean my room and change bed sheets',
+    }
+
+    def create_user_1(self):
+        register_user = {
+            'name': 'Test',
+            'email': 'test@gmail.com',
+            'password': 'password',
+            'password_check': 'password',
+        }
+        response = self.client.post(register_url, register_user, format='json')
+        return {
+           'Authorization': 'Bearer ' + response.data['token']['access']
+        }
+
+    def test_retry_replays_first_response(self):
+        """
+        Ensure retries of a create or update get the first response without touching the task table.
+        """
+        headers = self.create_user_1()
+        for urlconf in ['todo.urls', 'todo.asgi_urls']:
+            with self.subTest(urlconf = urlconf), self.settings(ROOT_URLCONF = urlconf):
+                Task.objects.all().delete()
+                key_headers = {**headers, 'Idempotency-Key': 'create-' + urlconf}
+                first = self.client.post(task_creation_url, self.task_data, format='json', headers = key_headers)
+                self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+                with CaptureQueriesContext(connection) as queries:
+                    retry = self.client.post(task_creation_url, self.task_data, format='json', headers = key_headers)
+                self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+                self.assertEqual(retry.content, first.content)
+                self.assertEqual(retry['Idempotent-Replayed'], 'true')
+                self.assertNotIn('todo_task', ' '.join(query['sql'] for query in queries.captured_queries))
+                self.assertEqual(Task.objects.count(), 1)
+
+                task_url = task_creation_url + '/' + str(first.json()['data']['id'])
+                key_headers = {**headers, 'Idempotency-Key': 'update-' + urlconf}
+                changes = {**self.task_data, 'status': 'COMPLETED'}
+                first = self.client.put(task_url, changes, format='json', headers = key_headers)
+                self.assertEqual(first.status_code, status.HTTP_200_OK)
+                Task.objects.update(status = 'PENDING')
+                retry = self.client.put(task_url, changes, format='json', headers = key_headers)
+                self.assertEqual(retry.content, first.content)
+                self.assertEqual(Task.objects.get().status, 'PENDING')
+
+    def test_key_reused_for_other_request(self):
+        """
+        Ensure a key cannot be reused for a different request or by mistake across users.
+        """
+        headers = self.create_user_1()
+        key_headers = {**headers, 'Idempotency-Key': 'key'}
+        self.client.post(task_creation_url, self.task_data, format='json', headers = key_headers)
+        response = self.client.post(task_creation_url, {**self.task_data, 'title': 'Other'}, format='json', headers = key_headers)
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Task.objects.count(), 1)
+
+        response = self.client.post(task_creation_url, self.task_data, format='json', headers = {**headers, 'Idempotency-Key': 'x' * 256})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_concurrent_duplicate_waits(self):
+        """
+        Ensure a duplicate of a request still running waits for its response instead of running again.
+        """
+        headers = self.create_user_1()
+        key_headers = {**headers, 'Idempotency-Key': 'key'}
+        self.client.post(task_creation_url, self.task_data, format='json', headers = key_headers)
+        record = IdempotencyRecord.objects.get()
+        IdempotencyRecord.objects.update(status_code = None, content = None)
+
+        def finish(seconds):
+            # The first request completes while the duplicate is polling
+            IdempotencyRecord.objects.update(status_code = 201, content = b'{"data":"first"}')
+
+        with mock.patch('todo.idempotency.time.sleep', side_effect = finish) as sleep:
+            response = self.client.post(task_creation_url, self.task_data, format='json', headers = key_headers)
+        sleep.assert_called_once()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.content, b'{"data":"first"}')
+        self.assertEqual(Task.objects.count(), 1)
+
+        IdempotencyRecord.objects.update(status_code = None, content = None)
+        with self.settings(IDEMPOTENCY_WAIT_SECONDS = 0):
+            response = self.client.post(task_creation_url, self.task_data, format='json', headers = key_headers)
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+        # A claim left behind by a dead worker is taken over
+        IdempotencyRecord.objects.update(created = record.created - timedelta(seconds = settings.IDEMPOTENCY_LOCK_SECONDS + 1))
+        Task.objects.all().delete()
+        response = self.client.post(task_creation_url, self.task_data, format='json', headers = key_headers)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual(Task.objects.count(), 1)
+
+    def test_purge_idempotency_records(self):
+        """
+        Ensure records older than the TTL are purged and no longer replayed.
+        """
+        headers = self.create_user_1()
+        key_headers = {**headers, 'Idempotency-Key': 'key'}
+        self.client.post(task_creation_url, self.task_data, format='json', headers = key_headers)
+        IdempotencyRecord.objects.update(created = timezone.now() - timedelta(seconds = settings.IDEMPOTENCY_KEY_TTL_SECONDS + 1))
+        Task.objects.all().delete()
+
+        response = self.client.post(task_creation_url, self.task_data, format='json', headers = key_headers)
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual(Task.objects.count(), 1)
+
+        IdempotencyRecord.objects.update(created = timezone.now() - timedelta(seconds = settings.IDEMPOTENCY_KEY_TTL_SECONDS + 1))
+        out = StringIO()
+        call_command('purge_idempotency_records', stdout = out)
+        self.assertIn('Removed 1 idempotency records', out.getvalue())
+        self.assertEqual(IdempotencyRecord.objects.count(), 0)
+
+class ColumnarTaskListTests(APITestCase):
+    """
+    Contains tests for the columnar representation of task lists
+    """
+    columnar = ColumnarTaskRenderer.media_type
+
+    def create_user_1(self):
+        register_user = {
+            'name': 'Test',
+            'email': 'test@gmail.com',
+            'password': 'password',
+            'password_check': 'password',
+        }
+        response = self.client.post(register_url, register_user, format='json')
+        return {
+           'Authorization': 'Bearer ' + response.data['token']['access']
+        }
+
+    def test_task_list_columnar(self):
+        """
+        Ensure task lists negotiated as columnar hold the same tasks as the JSON ones.
+        """
+        headers = self.create_user_1()
+        response = self.client.get(task_creation_url, headers = {**headers, 'Accept': self.columnar})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(response.content)['columns'], {field: [] for field in ['id', 'title', 'description', 'status', 'user']})
+
+        for i, task_status in enumerate(['PENDING', 'COMPLETED', 'IN_PROGRESS']):
+            task_data = {
+                'title': 'Task %d' % i,
+                'description': 'Description %d' % i,
+                'status': task_status,
+            }
+            self.client.post(task_creation_url, task_data, format='json', headers = headers)
+
+        for query in ['?page_size=2', '?page_size=2&ordering=-title', '?fields=id,status&ordering=updated']:
+            with self.subTest(query = query):
+                expected = self.client.get(task_creation_url + query, headers = headers).json()
+                response = self.client.get(task_creation_url + query, headers = {**headers, 'Accept': self.columnar})
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(response['Content-Type'], self.columnar + '; charset=utf-8')
+                self.assertIn('Accept', response['Vary'])
+                payload = json.loads(response.content)
+                self.assertEqual(payload['dictionaries'], {'status': ['PENDING', 'IN_PROGRESS', 'COMPLETED']})
+                columns = payload['columns']
+                columns['status'] = [payload['dictionaries']['status'][code] for code in columns['status']]
+                tasks = [dict(zip(columns, values)) for values in zip(*columns.values())]
+                self.assertEqual(tasks, expected['data'])
+                self.assertEqual(payload['next'], expected['next'])
+                self.assertEqual(payload['prev'], expected['prev'])
+
+        # Cursors are shared with the JSON representation
+        cursor = self.client.get(task_creation_url + '?page_size=2', headers = headers).json()['next']
+        response = self.client.get(task_creation_url + '?page_size=2&cursor=' + cursor, headers = {**headers, 'Accept': self.columnar})
+        payload = json.loads(response.content)
+        self.assertEqual(payload['columns']['title'], ['Task 2'])
+        self.assertEqual(payload['columns']['status'], [1])
+        self.assertIsNone(payload['next'])
+
+class SchemaTests(APITestCase):
+    """
+    Contains tests for the precomputed OpenAPI spec
+    """
+    def setUp(self):
+        schema.clear_documents()
+        self.addCleanup(schema.clear_documents)
+
+    def test_schema_artifacts_up_to_date(self):
+        """
+        Ensure the committed spec matches the views, run generate_openapi_schema when this fails.
+        """
+        for format, content in schema.generate().items():
+            with self.subTest(format = format), open(schema.artifact_path(format), 'rb') as artifact:
+                self.assertEqual(artifact.read(), content)
+
+    def test_schema_served_from_artifact(self):
+        """
+        Ensure the spec is served without walking the views, with an ETag and cache headers.
+        """
+        with mock.patch('todo.schema.OpenAPISchemaGenerator.get_schema') as get_schema:
+            for url, format in [('/swagger/?format=openapi', 'json'), ('/swagger.json', 'json'), ('/swagger.yaml', 'yaml')]:
+                with self.subTest(url = url), open(schema.artifact_path(format), 'rb') as artifact:
+                    response = self.client.get(url)
+                    self.assertEqual(response.status_code, status.HTTP_200_OK)
+                    self.assertEqual(response.content, artifact.read())
+                    self.assertIn('max-age=%d' % settings.OPENAPI_SCHEMA_MAX_AGE, response['Cache-Control'])
+
+                    revalidated = self.client.get(url, headers = {'If-None-Match': response['ETag']})
+                    self.assertEqual(revalidated.status_code, status.HTTP_304_NOT_MODIFIED)
+                    self.assertEqual(revalidated['ETag'], response['ETag'])
+        get_schema.assert_not_called()
+
+        # The UI page is built from a spec without any endpoint
+        response = self.client.get('/swagger/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/html; charset=utf-8')
+
+    def test_schema_generated_once_without_artifacts(self):
+        """
+        Ensure the spec is generated once per process when no artifact was written.
+        """
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        with self.settings(OPENAPI_SCHEMA_DIR = directory.name), mock.patch('todo.schema.generate', wraps = schema.generate) as generate:
+            for _ in range(2):
+                response = self.client.get('/swagger.json')
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(json.loads(response.content)['info']['title'], 'TODO API Docs')
+            generate.assert_called_once()
+
+            out = StringIO()
+            call_command('generate_openapi_schema', stdout = out)
+            self.assertIn(schema.artifact_path('yaml'), out.getvalue())
@@ -0,0 +1,186 @@
+import math
+import os
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+from todo import metrics
+
+class SQLiteBucketStore:
+    """
+    Token buckets in a small SQLite file shared by the worker processes.
+
+    Refilling and taking a token is a single UPSERT, so concurrent workers
+    never admit more than the bucket holds. The file only holds throttling
+    state, it is not synced to disk and can be lost without harm.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode = WAL')
+            conn.execute('PRAGMA synchronous = OFF')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL, updated REAL, allowed INTEGER)'
+                ' WITHOUT ROWID'
+            )
+            self._local.conn = conn
+        return conn
+
+    def take(self, key, capacity, rate, now=None):
+        """
+        Takes one token from the bucket of key, refilled at `rate` tokens per
+        second up to `capacity`. Returns whether a token was available and the
+        tokens left. SET expressions all see the row as it was before the update.
+        """
+        now = time.time() if now is None else now
+        refilled = 'MIN(:capacity, tokens + MAX(:now - updated, 0) * :rate)'
+        row = self.connect().execute(
+            'INSERT INTO buckets (key, tokens, updated, allowed) VALUES (:key, :capacity - 1, :now, 1) '
+            'ON CONFLICT (key) DO UPDATE SET '
+            'tokens = CASE WHEN {refilled} >= 1 THEN {refilled} - 1 ELSE {refilled} END, '
+            'allowed = {refilled} >= 1, updated = :now '
+            'RETURNING allowed, tokens'.format(refilled=refilled),
+            {'key': key, 'capacity': capacity, 'rate': rate, 'now': now},
+        ).fetchall()[0]
+        return bool(row[0]), row[1]
+
+    def clear(self):
+        self.connect().execute('DELETE FROM buckets')
+
+class CacheBucketStore:
+    """
+    Token buckets in a Django cache. The read-modify-write is not atomic,
+    so concurrent requests of one client may get a few tokens too many.
+    """
+    def __init__(self, alias):
+        self.alias = alias
+
+    def take(self, key, capacity, rate, now=None):
+        now = time.time() if now is None else now
+        cache = caches[self.alias]
+        tokens, updated = cache.get('throttle:%s' % key, (capacity, now))
+        tokens = min(capacity, tokens + max(now - updated, 0) * rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        # An untouched bucket is full again after capacity / rate seconds
+        cache.set('throttle:%s' % key, (tokens, now), timeout=math.ceil(capacity / rate))
+        return allowed, tokens
+
+    def clear(self):
+        caches[self.alias].clear()
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+def parse_rate(rate):
+    """
+    '10/min' -> (10, 60), the bucket size and the seconds it takes to refill.
+    """
+    count, period = rate.split('/')
+    return int(count), PERIODS[period[0]]
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+def get_store():
+    """
+    The bucket store configured by THROTTLING, one per process and configuration.
+    """
+    config = settings.THROTTLING
+    key = (os.getpid(), config['STORE'], config.get('PATH'), config.get('CACHE'))
+    store = _stores.get(key)
+    if store is None:
+        with _stores_lock:
+            store = _stores.get(key)
+            if store is None:
+                if config['STORE'] == 'sqlite':
+                    store = SQLiteBucketStore(config['PATH'])
+                else:
+                    store = CacheBucketStore(config.get('CACHE', 'default'))
+                _stores[key] = store
+    return store
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Throttle taking one token per request from a bucket of the client.
+
+    The rate of a scope, e.g. `'login_ip': '10/min'` in THROTTLING['RATES'],
+    is both the bucket size and how fast it refills, so a client can burst
+    up to 10 requests and then sustain one every 6 seconds. Scopes without a
+    rate are not throttled. The scope is the view's `throttle_scope` followed
+    by the throttle's `suffix`.
+    """
+    suffix = None
+    default_scope = 'api'
+
+    def get_scope(self, view):
+        return '%s_%s' % (getattr(view, 'throttle_scope', self.default_scope), self.suffix)
+
+    def get_key(self, request, view):
+        raise NotImplementedError('.get_key() must be overridden')
+
+    def allow_request(self, request, view):
+        config = settings.THROTTLING
+        scope = self.get_scope(view)
+        rate = config['RATES'].get(scope)
+        if not config['ENABLED'] or rate is None:
+            return True
+        key = self.get_key(request, view)
+        if key is None:
+            return True
+        capacity, period = parse_rate(rate)
+        refill = capacity / period
+        allowed, tokens = get_store().take('%s:%s' % (scope, key), capacity, refill)
+        if not allowed:
+            self.wait_seconds = (1 - tokens) / refill
+            metrics.throttled_requests.inc(scope = scope)
+        return allowed
+
+    def wait(self):
+        return self.wait_seconds
+
+class ClientIPThrottle(TokenBucketThrottle):
+    """
+    Buckets per client IP. X-Forwarded-For is only trusted with NUM_PROXIES set
+    in the DRF settings, otherwise clients could rotate it for fresh buckets.
+    """
+    suffix = 'ip'
+
+    def get_key(self, request, view):
+        return self.get_ident(request)
+
+class UserThrottle(TokenBucketThrottle):
+    """
+    Buckets per authenticated user.
+    """
+    suffix = 'user'
+
+    def get_key(self, request, view):
+        if not request.user or not request.user.is_authenticated:
+            return None
+        return request.user.id
+
+class LoginAccountThrottle(TokenBucketThrottle):
+    """
+    Buckets per account a login is attempted for, so guessing the password
+    of one account from many addresses is throttled as well.
+    """
+    suffix = 'account'
+
+    def get_key(self, request, view):
+        email = request.data.get('email') if hasattr(request.data, 'get') else None
+        if not isinstance(email, str) or not email:
+            return None
+        return email.strip().lower()
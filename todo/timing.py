@@ -0,0 +1,82 @@
+import contextvars
+import time
+from contextlib import contextmanager
+
+_current = contextvars.ContextVar('request_timings', default=None)
+
+class RequestTimings:
+    """
+    Durations of the phases of one request, collected for the Server-Timing header.
+    """
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.durations = {}
+        self.db_queries = 0
+
+    def add(self, name, seconds):
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+
+    def total(self):
+        return time.perf_counter() - self.started
+
+def start():
+    timings = RequestTimings()
+    return timings, _current.set(timings)
+
+def stop(token):
+    _current.reset(token)
+
+def current():
+    return _current.get()
+
+@contextmanager
+def phase(name):
+    """
+    Adds the time spent in the block to the named phase of the current request.
+    """
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - started)
+
+def db_wrapper(execute, sql, params, many, context):
+    """
+    Database execute wrapper timing every query of the current request.
+    The context variable follows the async ORM into its sync_to_async thread.
+    """
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.add('db', time.perf_counter() - started)
+        timings.db_queries += 1
+
+def install_db_wrapper(sender, connection, **kwargs):
+    """
+    connection_created receiver adding db_wrapper to every connection once.
+    """
+    if db_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(db_wrapper)
+
+class TimedSerializerMixin:
+    """
+    Times validation and representation of a serializer as the `serialize` phase.
+    Only the outermost serializer is timed, list serializers do not go
+    through their child's is_valid() or data.
+    """
+    def is_valid(self, *args, **kwargs):
+        with phase('serialize'):
+            return super().is_valid(*args, **kwargs)
+
+    @property
+    def data(self):
+        with phase('serialize'):
+            return super().data
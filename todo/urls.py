@@ -1,26 +1,16 @@
-from django.urls import include, path
-from rest_framework import permissions
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
-
-from todo import views
-
-schema_view = get_schema_view(
-   openapi.Info(
-      title="TODO API Docs",
-      default_version='v1',
-      description="Docs for rest api's in the project",
-      terms_of_service="https://www.example.com/terms/",
-      contact=openapi.Contact(email="prateekj1171998@gmail.com"),
-      license=openapi.License(name="Awesome License"),
-   ),
-   public=True,
-   permission_classes=(permissions.AllowAny,),
-)
+from django.urls import include, path, re_path
+from todo import schema, views
 
 urlpatterns = [
-    path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
+    path('swagger/', schema.SchemaView.with_ui('swagger'), name='schema-swagger-ui'),
+    re_path(r'^swagger(?P<format>\.json|\.yaml)$', schema.SchemaView.without_ui(), name='schema-json'),
+    path('metrics', views.metrics_view, name='metrics'),
     path("users/", include("authentication.urls")),
     path('tasks', views.TaskRegistrationView.as_view(), name='tasks'),
+    path('tasks/bulk', views.TaskBulkView.as_view(), name='tasks-bulk'),
+    path('tasks/export', views.TaskExportView.as_view(), name='tasks-export'),
+    path('tasks/changes', views.TaskChangesView.as_view(), name='tasks-changes'),
+    path('tasks/stats', views.TaskStatsView.as_view(), name='tasks-stats'),
+    path('tasks/search', views.TaskSearchView.as_view(), name='tasks-search'),
     path('tasks/<str:pk>', views.TaskDetailView.as_view(), name="tasks-Detail"),
 ]
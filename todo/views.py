@@ -1,24 +1,55 @@
+import hmac
+import sys
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, HttpResponseForbidden, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.views.decorators.http import require_GET
 from rest_framework import status
+from rest_framework.exceptions import ErrorDetail
 from rest_framework.response import Response
 from rest_framework.generics import GenericAPIView
 from rest_framework.permissions import IsAuthenticated
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 
+from todo import cache, metrics, routers, search, stats, sync
+from todo.conditional import conditional, task_detail_validators, task_list_validators
+from todo.idempotency import idempotent
 from todo.models import Task
-from todo.renderers import TaskRenderer
-from todo.serializers import TaskSerializer
+from todo.pagination import KeysetPagination
+from todo.renderers import ColumnarTaskRenderer, CSVRenderer, NDJSONRenderer, TaskRenderer
+from todo.serializers import (
+    TaskBulkSelectionSerializer, TaskBulkUpdateSerializer, TaskChangesSerializer, TaskListFilterSerializer,
+    TaskSearchSerializer, TaskSerializer,
+)
+
+def duplicate_task_response():
+    """
+    Response for a task violating the unique non complete title constraint
+    """
+    return Response({
+        'errors': {
+            'non_field_errors' : ['There is already a non complete task']
+        }
+    }, status=status.HTTP_400_BAD_REQUEST)
+
+idempotency_key_parameter = openapi.Parameter('Idempotency-Key', openapi.IN_HEADER, type=openapi.TYPE_STRING,
+    description='Unique key of the request, its retries get the first response back instead of running again')
 
 class TaskRegistrationView(GenericAPIView):
     """
     View for user registration
     """
-    renderer_classes = [TaskRenderer]
+    renderer_classes = [TaskRenderer, ColumnarTaskRenderer]
     serializer_class = TaskSerializer
     permission_classes = [IsAuthenticated]
+    throttle_scope = 'tasks'
+    pagination_class = KeysetPagination
 
-    @swagger_auto_schema(responses={
+    @swagger_auto_schema(manual_parameters=[idempotency_key_parameter], responses={
         status.HTTP_201_CREATED: openapi.Schema(
             type=openapi.TYPE_OBJECT,
             properties={
@@ -40,21 +71,19 @@ class TaskRegistrationView(GenericAPIView):
             }
         ),
     })
+    @idempotent
     def post(self, request):
         """
         Method to run on task creation post request
         """
-        serializer = TaskSerializer(data = {**request.data, 'user': request.user.id })
+        serializer = TaskSerializer(data = request.data)
         if serializer.is_valid():
-            # check if there is an already exisiting not complete task with same title
-            existing_task = Task.objects.filter(title = request.data['title'], user = request.user).exclude(status = Task.TaskStatus.COMPLETED)
-            if len(existing_task) > 0:
-                return Response({
-                    'errors': {
-                        'non_field_errors' : ['There is already a non complete task']
-                    }
-                }, status=status.HTTP_400_BAD_REQUEST)
-            task = serializer.save()
+            # an already exisiting not complete task with same title violates the unique constraint
+            try:
+                with transaction.atomic():
+                    task = serializer.save(user_id = request.user.id)
+            except IntegrityError:
+                return duplicate_task_response()
             return Response(
                 {
                     'data': {
@@ -62,7 +91,7 @@ class TaskRegistrationView(GenericAPIView):
                         'title' : task.title,
                         'description' : task.description,
                         'status' : task.status,
-                        'user' : task.user.id,
+                        'user' : task.user_id,
                     },
                     'msg' : 'Task created'
                 },
@@ -70,7 +99,26 @@ class TaskRegistrationView(GenericAPIView):
             )
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-    @swagger_auto_schema(responses={
+    @swagger_auto_schema(manual_parameters=[
+        openapi.Parameter('cursor', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+            description='Opaque cursor taken from the `next` or `prev` field of a previous page'),
+        openapi.Parameter('page_size', openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+            description='Number of tasks per page'),
+        openapi.Parameter('fields', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+            description='Comma separated subset of the task fields to return, e.g. id,title,status'),
+        openapi.Parameter('status', openapi.IN_QUERY, type=openapi.TYPE_ARRAY,
+            items=openapi.Items(type=openapi.TYPE_STRING, enum=Task.TaskStatus.values), collection_format='multi',
+            description='Only tasks with one of these statuses'),
+        openapi.Parameter('created_after', openapi.IN_QUERY, type=openapi.TYPE_STRING, format=openapi.FORMAT_DATETIME),
+        openapi.Parameter('created_before', openapi.IN_QUERY, type=openapi.TYPE_STRING, format=openapi.FORMAT_DATETIME),
+        openapi.Parameter('updated_after', openapi.IN_QUERY, type=openapi.TYPE_STRING, format=openapi.FORMAT_DATETIME),
+        openapi.Parameter('updated_before', openapi.IN_QUERY, type=openapi.TYPE_STRING, format=openapi.FORMAT_DATETIME),
+        openapi.Parameter('title_prefix', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+            description='Only tasks whose title starts with this, case sensitive'),
+        openapi.Parameter('ordering', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+            enum=['created', '-created', 'updated', '-updated', 'title', '-title'],
+            description='Field to order by, descending with a leading -'),
+    ], responses={
         status.HTTP_200_OK: openapi.Schema(
             type=openapi.TYPE_OBJECT,
             properties={
@@ -86,21 +134,449 @@ class TaskRegistrationView(GenericAPIView):
                         }
                     ),
                 ),
+                'next': openapi.Schema(type=openapi.TYPE_STRING),
+                'prev': openapi.Schema(type=openapi.TYPE_STRING),
             }
         ),
     })
+    @routers.read_from_replica
+    @conditional(task_list_validators)
     def get(self, request):
         """
         Method to run on task get request
         """
-        tasks = Task.objects.filter(user = request.user)
-        serializer = TaskSerializer(tasks, many = True)
+        fields = TaskSerializer.parse_fields(request.query_params.get('fields'))
+
+        def build_columnar_page():
+            # Plain value tuples straight from the cursor, no model instance or dict per task
+            columns = fields or TaskSerializer.Meta.fields
+            ordering = [field.lstrip('-') for field in self.paginator.get_ordering(request)]
+            tasks = filter_tasks(Task.objects.filter(user_id = request.user.id), request.query_params)
+            # Named rows give the paginator the cursor position by attribute, like model instances
+            rows = self.paginate_queryset(tasks.values_list(*dict.fromkeys([*columns, *ordering]), named = True))
+            columns, dictionaries = ColumnarTaskRenderer.build_columns(columns, rows)
+            return {
+                'columns': columns,
+                'dictionaries': dictionaries,
+                'next': self.paginator.next_cursor,
+                'prev': self.paginator.prev_cursor,
+            }
+
+        def build_page():
+            if isinstance(request.accepted_renderer, ColumnarTaskRenderer):
+                return build_columnar_page()
+            tasks = filter_tasks(Task.objects.filter(user_id = request.user.id), request.query_params)
+            if fields is not None:
+                # Columns outside the fieldset are never read, the cursor still needs the ordering ones
+                ordering = self.paginator.get_ordering(request)
+                tasks = tasks.only(*fields, *(field.lstrip('-') for field in ordering))
+            page = self.paginate_queryset(tasks)
+            serializer = TaskSerializer(page, many = True, fields = fields)
+            return self.get_paginated_response(serializer.data).data
+
+        payload = cache.get_or_set(request.user.id, build_page, 'list', request.get_full_path(), request.META.get('HTTP_ACCEPT', ''))
+        return Response(payload, status=status.HTTP_200_OK)
+
+def find_duplicate_titles(user_id, items):
+    """
+    Returns per item errors for non complete tasks whose title is already taken,
+    either earlier in the same batch or by an existing task of the user.
+    """
+    open_titles = [item['title'] for item in items if item.get('status') != Task.TaskStatus.COMPLETED]
+    taken = set(
+        Task.objects.filter(user_id = user_id, title__in = open_titles)
+        .exclude(status = Task.TaskStatus.COMPLETED)
+        .values_list('title', flat = True)
+    )
+    errors = []
+    for item in items:
+        if item.get('status') == Task.TaskStatus.COMPLETED:
+            errors.append({})
+        elif item['title'] in taken:
+            errors.append({
+                'non_field_errors': [ErrorDetail('There is already a non complete task', code='unique')]
+            })
+        else:
+            taken.add(item['title'])
+            errors.append({})
+    return errors
+
+def filter_tasks(queryset, query_params):
+    """
+    Applies the list filters of the query string. Each one is a range or
+    equality on a column following user_id in one of the Task indexes.
+    """
+    filters = TaskListFilterSerializer(data = query_params)
+    filters.is_valid(raise_exception = True)
+    filters = filters.validated_data
+
+    if filters.get('status'):
+        queryset = queryset.filter(status__in = filters['status'])
+    for field in ('created', 'updated'):
+        if field + '_after' in filters:
+            queryset = queryset.filter(**{field + '__gte': filters[field + '_after']})
+        if field + '_before' in filters:
+            queryset = queryset.filter(**{field + '__lt': filters[field + '_before']})
+    prefix = filters.get('title_prefix')
+    if prefix:
+        # A range instead of LIKE 'prefix%', which SQLite only runs on an index
+        # for NOCASE columns. This also keeps the prefix case sensitive.
+        queryset = queryset.filter(title__gte = prefix)
+        # The maximum code point has no successor, past it every title sorting after
+        # the prefix also starts with it, so the bound moves to the previous character
+        stem = prefix.rstrip(chr(sys.maxunicode))
+        if stem:
+            successor = ord(stem[-1]) + 1
+            # Surrogates cannot be encoded for SQLite, none can be part of a title either
+            if 0xD800 <= successor <= 0xDFFF:
+                successor = 0xE000
+            queryset = queryset.filter(title__lt = stem[:-1] + chr(successor))
+    return queryset
+
+def select_tasks(user_id, selection):
+    """
+    Returns the queryset of the user's tasks matching a validated bulk selection
+    """
+    tasks = Task.objects.filter(user_id = user_id)
+    if 'ids' in selection:
+        tasks = tasks.filter(id__in = selection['ids'])
+    if 'filter' in selection:
+        tasks = tasks.filter(**selection['filter'])
+    return tasks
+
+class TaskBulkView(GenericAPIView):
+    """
+    View for bulk task operations
+    """
+    renderer_classes = [TaskRenderer]
+    serializer_class = TaskSerializer
+    permission_classes = [IsAuthenticated]
+    throttle_scope = 'tasks'
+    max_items = 500
+
+    @swagger_auto_schema(request_body=TaskSerializer(many=True), responses={
+        status.HTTP_201_CREATED: openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                'data': openapi.Schema(
+                    type=openapi.TYPE_ARRAY,
+                    items=openapi.Schema(
+                        type=openapi.TYPE_OBJECT,
+                        properties={
+                            'id': openapi.Schema(type=openapi.TYPE_STRING),
+                            'title': openapi.Schema(type=openapi.TYPE_STRING),
+                            'description': openapi.Schema(type=openapi.TYPE_STRING),
+                            'status': openapi.Schema(type=openapi.TYPE_STRING),
+                            'user': openapi.Schema(type=openapi.TYPE_STRING),
+                        }
+                    ),
+                ),
+                'msg': openapi.Schema(type=openapi.TYPE_STRING)
+            }
+        ),
+        status.HTTP_400_BAD_REQUEST: openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                'errors': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_OBJECT))
+            }
+        ),
+    })
+    def post(self, request):
+        """
+        Method to run on bulk task creation request.
+        Either every task of the batch is created or none is, errors are reported per item.
+        """
+        serializer = TaskSerializer(data = request.data, many = True, max_length = self.max_items, allow_empty = False)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        errors = find_duplicate_titles(request.user.id, serializer.validated_data)
+        if any(errors):
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            with transaction.atomic():
+                tasks = serializer.save(user_id = request.user.id)
+        except IntegrityError:
+            # a concurrent request took one of the titles after our check
+            return duplicate_task_response()
+        # bulk_create() does not send post_save, see todo.signals
+        cache.invalidate(request.user.id)
+        routers.pin_to_primary(request.user.id)
         return Response(
-                {
-                    'data': serializer.data,
+            {
+                'data': TaskSerializer(tasks, many = True).data,
+                'msg' : 'Tasks created'
+            },
+            status=status.HTTP_201_CREATED
+        )
+
+    @swagger_auto_schema(request_body=TaskBulkUpdateSerializer, responses={
+        status.HTTP_200_OK: openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                'data': openapi.Schema(type=openapi.TYPE_OBJECT,
+                    properties={
+                        'updated': openapi.Schema(type=openapi.TYPE_INTEGER),
+                    }),
+                'msg': openapi.Schema(type=openapi.TYPE_STRING)
+            }
+        ),
+        status.HTTP_400_BAD_REQUEST: openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                'errors': openapi.Schema(type=openapi.TYPE_STRING)
+            }
+        ),
+    })
+    def patch(self, request):
+        """
+        Method to run on bulk task update request, runs as a single UPDATE statement
+        """
+        serializer = TaskBulkUpdateSerializer(data = request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        changes = serializer.validated_data['changes']
+        try:
+            with transaction.atomic():
+                # QuerySet.update() skips auto_now, so bump the timestamp explicitly
+                updated = select_tasks(request.user.id, serializer.validated_data).update(**changes, updated = timezone.now())
+        except IntegrityError:
+            return duplicate_task_response()
+        # update() does not send post_save, see todo.signals
+        cache.invalidate(request.user.id)
+        routers.pin_to_primary(request.user.id)
+        return Response(
+            {
+                'data': {
+                    'updated': updated,
                 },
-                status=status.HTTP_200_OK
-            )
+                'msg': 'Tasks updated'
+            },
+            status=status.HTTP_200_OK
+        )
+
+    @swagger_auto_schema(request_body=TaskBulkSelectionSerializer, responses={
+        status.HTTP_200_OK: openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                'data': openapi.Schema(type=openapi.TYPE_OBJECT,
+                    properties={
+                        'deleted': openapi.Schema(type=openapi.TYPE_INTEGER),
+                    }),
+                'msg': openapi.Schema(type=openapi.TYPE_STRING)
+            }
+        ),
+        status.HTTP_400_BAD_REQUEST: openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                'errors': openapi.Schema(type=openapi.TYPE_STRING)
+            }
+        ),
+    })
+    def delete(self, request):
+        """
+        Method to run on bulk task deletion request, runs as a single DELETE statement
+        """
+        serializer = TaskBulkSelectionSerializer(data = request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        # No signal receivers on Task, so this is a fast delete without a SELECT
+        deleted, _ = select_tasks(request.user.id, serializer.validated_data).delete()
+        cache.invalidate(request.user.id)
+        routers.pin_to_primary(request.user.id)
+        return Response(
+            {
+                'data': {
+                    'deleted': deleted,
+                },
+                'msg': 'Tasks deleted'
+            },
+            status=status.HTTP_200_OK
+        )
+
+class TaskExportView(GenericAPIView):
+    """
+    View for streaming all tasks of a user as NDJSON or CSV
+    """
+    renderer_classes = [NDJSONRenderer, CSVRenderer]
+    permission_classes = [IsAuthenticated]
+    throttle_scope = 'tasks'
+    export_fields = ('id', 'title', 'description', 'status', 'created', 'updated')
+    chunk_size = 2000
+
+    @swagger_auto_schema(manual_parameters=[
+        openapi.Parameter('format', openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=['ndjson', 'csv'],
+            description='Export format, can also be chosen through the Accept header'),
+    ], responses={
+        status.HTTP_200_OK: openapi.Schema(type=openapi.TYPE_STRING),
+    })
+    def get(self, request):
+        """
+        Method to run on task export request
+        """
+        renderer = request.accepted_renderer
+        # Rows are read through a server side cursor and encoded one by one,
+        # so memory stays flat however many tasks the user has.
+        # The rows are read after the handler returns, so the replica is picked up front
+        rows = Task.objects.using(routers.read_database(request.user.id)) \
+            .filter(user_id = request.user.id).order_by('created', 'id') \
+            .values_list(*self.export_fields).iterator(chunk_size = self.chunk_size)
+        response = StreamingHttpResponse(
+            renderer.stream(self.export_fields, rows),
+            content_type='%s; charset=%s' % (renderer.media_type, renderer.charset),
+        )
+        response['Content-Disposition'] = 'attachment; filename="tasks.%s"' % renderer.format
+        return response
+
+class TaskChangesView(GenericAPIView):
+    """
+    View for incremental sync of a user's tasks
+    """
+    renderer_classes = [TaskRenderer]
+    serializer_class = TaskSerializer
+    permission_classes = [IsAuthenticated]
+    throttle_scope = 'tasks'
+
+    @swagger_auto_schema(manual_parameters=[
+        openapi.Parameter('since', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+            description='Token of the previous sync, omit it for a full sync'),
+        openapi.Parameter('page_size', openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+            description='Maximum number of changed and of deleted tasks, at most 1000'),
+        openapi.Parameter('fields', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+            description='Comma separated subset of the task fields to return, e.g. id,title,status'),
+    ], responses={
+        status.HTTP_200_OK: openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                'data': openapi.Schema(
+                    type=openapi.TYPE_ARRAY,
+                    items=openapi.Schema(
+                        type=openapi.TYPE_OBJECT,
+                        properties={
+                            'id': openapi.Schema(type=openapi.TYPE_STRING),
+                            'title': openapi.Schema(type=openapi.TYPE_STRING),
+                            'description': openapi.Schema(type=openapi.TYPE_STRING),
+                            'status': openapi.Schema(type=openapi.TYPE_STRING),
+                            'user': openapi.Schema(type=openapi.TYPE_STRING)
+                        }
+                    ),
+                ),
+                'deleted': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_INTEGER)),
+                'token': openapi.Schema(type=openapi.TYPE_STRING),
+                'has_more': openapi.Schema(type=openapi.TYPE_BOOLEAN),
+            }
+        ),
+        status.HTTP_410_GONE: openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                'errors': openapi.Schema(type=openapi.TYPE_STRING)
+            }
+        ),
+    })
+    @routers.read_from_replica
+    def get(self, request):
+        """
+        Method to run on task changes request, returns what changed since the given token
+        """
+        params = TaskChangesSerializer(data = request.query_params)
+        params.is_valid(raise_exception = True)
+        fields = TaskSerializer.parse_fields(request.query_params.get('fields'))
+        tasks = Task.objects.only(*fields, 'id', 'updated') if fields is not None else None
+
+        tasks, deleted, token, has_more = sync.get_changes(
+            request.user.id, params.validated_data.get('since'), params.validated_data['page_size'], tasks,
+        )
+        return Response(
+            {
+                'data': TaskSerializer(tasks, many = True, fields = fields).data,
+                'deleted': deleted,
+                'token': token,
+                'has_more': has_more,
+            },
+            status=status.HTTP_200_OK
+        )
+
+class TaskStatsView(GenericAPIView):
+    """
+    View for the number of tasks of a user in each status
+    """
+    renderer_classes = [TaskRenderer]
+    permission_classes = [IsAuthenticated]
+    throttle_scope = 'tasks'
+
+    @swagger_auto_schema(responses={
+        status.HTTP_200_OK: openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                'data': openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'pending': openapi.Schema(type=openapi.TYPE_INTEGER),
+                        'in_progress': openapi.Schema(type=openapi.TYPE_INTEGER),
+                        'completed': openapi.Schema(type=openapi.TYPE_INTEGER),
+                        'total': openapi.Schema(type=openapi.TYPE_INTEGER),
+                    }
+                ),
+            }
+        ),
+    })
+    @routers.read_from_replica
+    def get(self, request):
+        """
+        Method to run on task stats request
+        """
+        return Response({'data': stats.get_stats(request.user.id)}, status=status.HTTP_200_OK)
+
+class TaskSearchView(GenericAPIView):
+    """
+    View for full text search over the title and description of a user's tasks
+    """
+    renderer_classes = [TaskRenderer]
+    serializer_class = TaskSerializer
+    permission_classes = [IsAuthenticated]
+    throttle_scope = 'tasks'
+
+    @swagger_auto_schema(manual_parameters=[
+        openapi.Parameter('q', openapi.IN_QUERY, type=openapi.TYPE_STRING, required=True,
+            description='Words to search for, the last one also matches as a prefix'),
+        openapi.Parameter('page_size', openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+            description='Number of results, at most 100'),
+        openapi.Parameter('fields', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+            description='Comma separated subset of the task fields to return, e.g. id,title,status'),
+    ], responses={
+        status.HTTP_200_OK: openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                'data': openapi.Schema(
+                    type=openapi.TYPE_ARRAY,
+                    items=openapi.Schema(
+                        type=openapi.TYPE_OBJECT,
+                        properties={
+                            'id': openapi.Schema(type=openapi.TYPE_STRING),
+                            'title': openapi.Schema(type=openapi.TYPE_STRING),
+                            'description': openapi.Schema(type=openapi.TYPE_STRING),
+                            'status': openapi.Schema(type=openapi.TYPE_STRING),
+                            'user': openapi.Schema(type=openapi.TYPE_STRING)
+                        }
+                    ),
+                ),
+            }
+        ),
+    })
+    @routers.read_from_replica
+    def get(self, request):
+        """
+        Method to run on task search request, best matches first
+        """
+        params = TaskSearchSerializer(data = request.query_params)
+        params.is_valid(raise_exception = True)
+        fields = TaskSerializer.parse_fields(request.query_params.get('fields'))
+
+        def build_results():
+            tasks = search.search_tasks(request.user.id, params.validated_data['q'], params.validated_data['page_size'], fields)
+            return TaskSerializer(tasks, many = True, fields = fields).data
+
+        data = cache.get_or_set(request.user.id, build_results, 'search', request.get_full_path(), request.META.get('HTTP_ACCEPT', ''))
+        return Response({'data': data}, status=status.HTTP_200_OK)
 
 class TaskDetailView(GenericAPIView):
     """
@@ -108,13 +584,20 @@ class TaskDetailView(GenericAPIView):
     """
     renderer_classes = [TaskRenderer]
     serializer_class = TaskSerializer
+    # Only read by the schema generator, for the type of the pk path parameter
+    queryset = Task.objects.all()
     permission_classes = [IsAuthenticated]
+    throttle_scope = 'tasks'
 
-    def get_task(self, pk, user):
-        obj = get_object_or_404(Task, pk=pk, user=user)
+    def get_task(self, pk, user_id, fields=None):
+        queryset = Task.objects.only(*fields) if fields is not None else Task
+        obj = get_object_or_404(queryset, pk=pk, user_id=user_id)
         return obj
 
-    @swagger_auto_schema(responses={
+    @swagger_auto_schema(manual_parameters=[
+        openapi.Parameter('fields', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+            description='Comma separated subset of the task fields to return, e.g. id,title,status'),
+    ], responses={
         status.HTTP_200_OK: openapi.Schema(
             type=openapi.TYPE_OBJECT,
             properties={
@@ -136,16 +619,23 @@ class TaskDetailView(GenericAPIView):
             }
         ),
     })
+    @routers.read_from_replica
+    @conditional(task_detail_validators)
     def get(self, request, pk):
         """
         Method to run on task detail get request
         """
-        task = self.get_task(pk = pk, user = request.user)
+        fields = TaskSerializer.parse_fields(request.query_params.get('fields'))
 
-        serializer = TaskSerializer(task, many = False)
+        def build_task():
+            task = self.get_task(pk = pk, user_id = request.user.id, fields = fields)
+            serializer = TaskSerializer(task, many = False, fields = fields)
+            return serializer.data
+
+        data = cache.get_or_set(request.user.id, build_task, 'detail', request.get_full_path(), request.META.get('HTTP_ACCEPT', ''))
         return Response(
                 {
-                    'data': serializer.data,
+                    'data': data,
                 },
                 status=status.HTTP_200_OK
             )
@@ -169,8 +659,10 @@ class TaskDetailView(GenericAPIView):
         Method to run on task deletion request
         """
          # Ideally, we should return a 403 here if task belongs to other user.
-        task = self.get_task(pk = pk, user = request.user)
+        task = self.get_task(pk = pk, user_id = request.user.id)
         task.delete()
+        cache.invalidate(request.user.id)
+        routers.pin_to_primary(request.user.id)
 
         return Response(
                 {
@@ -179,7 +671,7 @@ class TaskDetailView(GenericAPIView):
                 status=status.HTTP_200_OK
             )
 
-    @swagger_auto_schema(responses={
+    @swagger_auto_schema(manual_parameters=[idempotency_key_parameter], responses={
         status.HTTP_200_OK: openapi.Schema(
             type=openapi.TYPE_OBJECT,
             properties={
@@ -193,15 +685,20 @@ class TaskDetailView(GenericAPIView):
             }
         ),
     })
+    @idempotent
     def put(self, request, pk):
         """
         Method to run on task updation request
         """
          # Ideally, we should return a 403 here if task belongs to other user.
-        task = self.get_task(pk = pk, user = request.user)
-        serializer = TaskSerializer(instance=task, data = {**request.data, 'user': request.user.id })
+        task = self.get_task(pk = pk, user_id = request.user.id)
+        serializer = TaskSerializer(instance=task, data = request.data)
         if serializer.is_valid():
-            serializer.save()
+            try:
+                with transaction.atomic():
+                    serializer.save()
+            except IntegrityError:
+                return duplicate_task_response()
             return Response(
                     {
                         'data': 'Task updated successfully',
@@ -209,3 +706,22 @@ class TaskDetailView(GenericAPIView):
                     status=status.HTTP_200_OK
                 )
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+def can_scrape_metrics(request):
+    # The socket address, X-Forwarded-For is up to the client
+    if request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS:
+        return True
+    if not settings.METRICS_TOKEN:
+        return False
+    scheme, _, token = request.META.get('HTTP_AUTHORIZATION', '').partition(' ')
+    return scheme.lower() == 'bearer' and hmac.compare_digest(token.encode(), settings.METRICS_TOKEN.encode())
+
+@require_GET
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint, sums the counters of every worker process.
+    Only open to METRICS_ALLOWED_IPS and to requests bearing METRICS_TOKEN.
+    """
+    if not can_scrape_metrics(request):
+        return HttpResponseForbidden()
+    return HttpResponse(metrics.exposition(), content_type=metrics.CONTENT_TYPE)